@@ -1,6 +1,19 @@
 from django.apps import AppConfig
+from django.core.exceptions import ImproperlyConfigured
 
 
 class ApiConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'api'
+
+    def ready(self):
+        from django.core.cache import caches
+        from django.core.cache.backends.locmem import LocMemCache
+
+        from api import signals  # noqa: F401
+
+        if isinstance(caches['default'], LocMemCache):
+            raise ImproperlyConfigured(
+                'Счётчики версий кешей должны быть общими для процессов: '
+                'CACHE_BACKEND=locmem не поддерживается.'
+            )
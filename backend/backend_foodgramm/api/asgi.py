@@ -0,0 +1,61 @@
+from asgiref.sync import ThreadSensitiveContext, sync_to_async
+from django.core.handlers.asgi import ASGIHandler as DjangoASGIHandler
+
+from recipes.asynchronous import pooled
+
+
+def read_chunk(parts, size):
+    chunk = bytearray()
+    for part in parts:
+        chunk += part
+        if len(chunk) >= size:
+            break
+    return bytes(chunk)
+
+
+class ASGIHandler(DjangoASGIHandler):
+
+    async def __call__(self, scope, receive, send):
+        # Синхронный код одного запроса (промежуточные слои, обычные
+        # представления, потоковые ответы) выполняется в своём потоке,
+        # а не в общем для всего процесса.
+        pooled.set(True)
+        async with ThreadSensitiveContext():
+            await super().__call__(scope, receive, send)
+
+    async def send_response(self, response, send):
+        if not response.streaming:
+            return await super().send_response(response, send)
+        # Django 3.2 читает потоковый ответ прямо в цикле событий; здесь
+        # части собираются в потоке запроса и отправляются по мере
+        # готовности клиента.
+        await send({
+            'type': 'http.response.start',
+            'status': response.status_code,
+            'headers': [
+                *(
+                    (header.encode('ascii'), value.encode('latin1'))
+                    for header, value in response.items()
+                ),
+                *(
+                    (b'Set-Cookie',
+                     cookie.output(header='').encode('ascii').strip())
+                    for cookie in response.cookies.values()
+                ),
+            ],
+        })
+        parts = iter(response)
+        read = sync_to_async(read_chunk, thread_sensitive=True)
+        try:
+            while True:
+                chunk = await read(parts, self.chunk_size)
+                if not chunk:
+                    break
+                await send({
+                    'type': 'http.response.body',
+                    'body': chunk,
+                    'more_body': True,
+                })
+            await send({'type': 'http.response.body'})
+        finally:
+            await sync_to_async(response.close, thread_sensitive=True)()
@@ -0,0 +1,73 @@
+import copy
+import time
+from collections import OrderedDict
+from threading import Lock
+
+from django.conf import settings
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.permissions import SAFE_METHODS
+
+
+class TokenCache:
+
+    def __init__(self, max_size, ttl):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.entries = OrderedDict()
+        self.lock = Lock()
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            credentials, expires = entry
+            if expires < time.monotonic():
+                del self.entries[key]
+                return None
+            self.entries.move_to_end(key)
+            return credentials
+
+    def set(self, key, credentials):
+        with self.lock:
+            self.entries[key] = (credentials, time.monotonic() + self.ttl)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+
+    def delete(self, key):
+        with self.lock:
+            self.entries.pop(key, None)
+
+    def delete_user(self, user_id):
+        with self.lock:
+            for key in [
+                key for key, ((user, _), _) in self.entries.items()
+                if user.pk == user_id
+            ]:
+                del self.entries[key]
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+
+token_cache = TokenCache(settings.TOKEN_CACHE_SIZE, settings.TOKEN_CACHE_TTL)
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    safe = True
+
+    def authenticate(self, request):
+        self.safe = request.method in SAFE_METHODS
+        return super().authenticate(request)
+
+    def authenticate_credentials(self, key):
+        # Изменяющие запросы получают свежего пользователя из базы,
+        # чтобы сохранение не перезаписало поля устаревшей копией.
+        credentials = token_cache.get(key) if self.safe else None
+        if credentials is None:
+            credentials = super().authenticate_credentials(key)
+            token_cache.set(key, copy.deepcopy(credentials))
+            return credentials
+        return copy.deepcopy(credentials)
@@ -0,0 +1,57 @@
+from itertools import cycle, islice
+from statistics import mean
+from time import perf_counter
+
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from rest_framework.authtoken.models import Token
+
+from recipes.models import User
+
+
+def percentile(values, percent):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * percent / 100))]
+
+
+def create_client(username):
+    user = User.objects.create_user(
+        username=username,
+        email=f'{username}@example.com',
+        password=username,
+        first_name=username,
+        last_name=username,
+    )
+    return user, Client(
+        HTTP_AUTHORIZATION=f'Token {Token.objects.create(user=user).key}'
+    )
+
+
+def measure(client, urls, repeat, **extra):
+    timings = []
+    queries = []
+    for url in islice(cycle(urls), repeat):
+        with CaptureQueriesContext(connection) as context:
+            start = perf_counter()
+            response = client.get(url, **extra)
+            if response.streaming:
+                b''.join(response.streaming_content)
+            timings.append((perf_counter() - start) * 1000)
+        queries.append(len(context))
+    return {
+        'status': response.status_code,
+        'queries': max(queries),
+        'mean': mean(timings),
+        'p50': percentile(timings, 50),
+        'p95': percentile(timings, 95),
+        'p99': percentile(timings, 99),
+    }
+
+
+def format_result(name, result):
+    return (
+        f'{name}: статус {result["status"]}, запросов {result["queries"]}, '
+        f'mean {result["mean"]:.2f} мс, p50 {result["p50"]:.2f} мс, '
+        f'p95 {result["p95"]:.2f} мс, p99 {result["p99"]:.2f} мс'
+    )
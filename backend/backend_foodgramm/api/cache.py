@@ -0,0 +1,120 @@
+import time
+from hashlib import md5
+from urllib.parse import urlencode
+
+from django.core.cache import cache, caches
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import quote_etag
+from rest_framework.response import Response
+
+from api.metrics import TimedJSONRenderer
+
+VERSION_KEY = 'version:{name}'
+RESPONSE_KEY = 'response:{name}:{version}:{digest}'
+
+response_cache = caches['responses']
+
+
+def get_version(name):
+    key = VERSION_KEY.format(name=name)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, time.time_ns() // 1000, timeout=None)
+        version = cache.get(key)
+    return version
+
+
+def bump_version(name):
+    cache.set(
+        VERSION_KEY.format(name=name),
+        max(time.time_ns() // 1000, get_version(name) + 1),
+        timeout=None,
+    )
+
+
+class VersionedCacheMixin:
+    version_name = None
+
+    def list(self, request, *args, **kwargs):
+        return self.versioned_response(
+            request, super().list, *args, **kwargs
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.versioned_response(
+            request, super().retrieve, *args, **kwargs
+        )
+
+    def versioned_response(self, request, get_response, *args, **kwargs):
+        if request.accepted_renderer.format != 'json':
+            return get_response(request, *args, **kwargs)
+        version = get_version(self.version_name)
+        digest = md5(request.get_full_path().encode()).hexdigest()
+        etag = quote_etag(f'{self.version_name}-{version}-{digest[:12]}')
+        # Только ETag: у Last-Modified секундная точность, и два изменения
+        # за одну секунду давали бы устаревший ответ 304.
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            key = RESPONSE_KEY.format(
+                name=self.version_name, version=version, digest=digest
+            )
+            content = response_cache.get(key)
+            if content is None:
+                drf_response = get_response(request, *args, **kwargs)
+                if drf_response.status_code != 200:
+                    return drf_response
+                content = TimedJSONRenderer().render(drf_response.data)
+                response_cache.set(key, content)
+            response = HttpResponse(
+                content, content_type='application/json'
+            )
+        response['ETag'] = etag
+        patch_cache_control(response, no_cache=True)
+        return response
+
+
+class AnonymousCacheMixin:
+    version_name = None
+    cache_query_params = ()
+
+    def list(self, request, *args, **kwargs):
+        return self.anonymous_response(
+            request, super().list, *args, **kwargs
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.anonymous_response(
+            request, super().retrieve, *args, **kwargs
+        )
+
+    def get_cache_digest(self, request):
+        return md5(urlencode(sorted(
+            (name, value)
+            for name in self.cache_query_params
+            for value in request.query_params.getlist(name)
+        )).encode() + request.build_absolute_uri(
+            request.path
+        ).encode()).hexdigest()
+
+    def anonymous_response(self, request, get_response, *args, **kwargs):
+        if (request.user.is_authenticated
+                or request.accepted_renderer.format != 'json'):
+            return get_response(request, *args, **kwargs)
+        key = RESPONSE_KEY.format(
+            name=self.version_name,
+            version=get_version(self.version_name),
+            digest=self.get_cache_digest(request),
+        )
+        content = response_cache.get(key)
+        if content is None:
+            response = get_response(request, *args, **kwargs)
+            if response.status_code != 200:
+                return response
+            # Список рецептов уже приходит готовым JSON.
+            content = (
+                TimedJSONRenderer().render(response.data)
+                if isinstance(response, Response) else response.content
+            )
+            response_cache.set(key, content)
+        return HttpResponse(content, content_type='application/json')
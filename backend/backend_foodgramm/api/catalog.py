@@ -0,0 +1,68 @@
+from django.conf import settings
+
+from api.cache import get_version
+from recipes.models import Ingredient, Tag
+
+
+class VersionedCatalog:
+
+    def __init__(self, version_name, build):
+        self.version_name = version_name
+        self.build = build
+        self.entry = None
+
+    def get(self):
+        version = get_version(self.version_name)
+        entry = self.entry
+        if entry is None or entry[0] != version:
+            entry = self.entry = (version, self.build())
+        return entry[1]
+
+
+class KnownIds:
+
+    def __init__(self, version_name, model):
+        self.version_name = version_name
+        self.model = model
+        self.entry = None
+
+    def existing(self, ids):
+        version = get_version(self.version_name)
+        entry = self.entry
+        if entry is None or entry[0] != version:
+            entry = self.entry = (version, set())
+        known = entry[1]
+        ids = set(ids)
+        missing = ids - known
+        if not missing:
+            return ids
+        found = set(self.model.objects.filter(
+            id__in=missing
+        ).order_by().values_list('id', flat=True))
+        if len(known) + len(found) > settings.CATALOG_KNOWN_IDS_MAX:
+            known.clear()
+        known |= found
+        return ids - missing | found
+
+    def forget(self, ids):
+        if self.entry is not None:
+            self.entry[1].difference_update(ids)
+
+
+tag_ids = VersionedCatalog(
+    'tags', lambda: dict(Tag.objects.values_list('slug', 'id'))
+)
+
+# Порядок тегов совпадает с порядком сортировки в базе (Meta.ordering).
+tags_by_id = VersionedCatalog('tags', lambda: {
+    tag['id']: (position, tag)
+    for position, tag in enumerate(Tag.objects.values('id', 'name', 'slug'))
+})
+
+
+def tag_choices():
+    return [(slug, slug) for slug in tag_ids.get()]
+
+
+known_ingredients = KnownIds('ingredients', Ingredient)
+known_tags = KnownIds('tags', Tag)
@@ -0,0 +1,109 @@
+from collections import defaultdict
+
+from django.db.models import Exists, OuterRef
+from djoser.serializers import UserSerializer as DjoserUserSerializer
+
+from api.catalog import tags_by_id
+from recipes.images import rendition_urls
+from recipes.models import (
+    Favorite, Follow, Recipe, RecipeIngredient, ShoppingCart, User
+)
+
+USER_FIELDS = DjoserUserSerializer.Meta.fields
+RECIPE_IMAGE = Recipe._meta.get_field('image')
+USER_AVATAR = User._meta.get_field('avatar')
+
+
+def image_urls(request, field, name, renditions_name):
+    # Повторяет ImageField и ImageRenditionsField сериализаторов.
+    if not name:
+        return None, None
+    image = field.attr_class(None, field, name)
+    return request.build_absolute_uri(image.url), {
+        rendition: request.build_absolute_uri(url)
+        for rendition, url in rendition_urls(
+            image, ready=renditions_name == name
+        ).items()
+    }
+
+
+def serialize_recipes(ids, request):
+    # Тот же результат, что и ResipesReadSerializer(many=True), но из
+    # values() без создания моделей и полей сериализатора.
+    if not ids:
+        return []
+    user = request.user
+    recipes = Recipe.objects.filter(id__in=ids).order_by().values(
+        'id', 'image', 'image_renditions_name', 'author_id', 'name', 'text',
+        'cooking_time',
+    )
+    authors = User.objects.order_by().values(
+        *USER_FIELDS, 'avatar', 'avatar_renditions_name'
+    )
+    if user.is_authenticated:
+        recipes = recipes.annotate(
+            is_favorited=Exists(Favorite.objects.filter(
+                user=user, recipe=OuterRef('pk')
+            )),
+            is_in_shopping_cart=Exists(ShoppingCart.objects.filter(
+                user=user, recipe=OuterRef('pk')
+            )),
+        )
+        authors = authors.annotate(is_subscribed=Exists(
+            Follow.objects.filter(user=user, following=OuterRef('pk'))
+        ))
+    recipes = {recipe['id']: recipe for recipe in recipes}
+    authors = {
+        author['id']: author for author in authors.filter(id__in={
+            recipe['author_id'] for recipe in recipes.values()
+        })
+    }
+    catalog = tags_by_id.get()
+    tags = defaultdict(list)
+    for recipe_id, tag_id in Recipe.tags.through.objects.filter(
+        recipe_id__in=ids
+    ).values_list('recipe_id', 'tag_id'):
+        tags[recipe_id].append(catalog[tag_id])
+    ingredients = defaultdict(list)
+    for recipe_id, *ingredient in RecipeIngredient.objects.filter(
+        recipe_id__in=ids
+    ).values_list(
+        'recipe_id', 'ingredient_id', 'ingredient__name',
+        'ingredient__measurement_unit', 'amount',
+    ):
+        ingredients[recipe_id].append(dict(zip(
+            ('id', 'name', 'measurement_unit', 'amount'), ingredient
+        )))
+    serialized_authors = {}
+    for author_id, author in authors.items():
+        avatar, avatar_renditions = image_urls(
+            request, USER_AVATAR, author['avatar'],
+            author['avatar_renditions_name'],
+        )
+        serialized_authors[author_id] = {
+            **{field: author[field] for field in USER_FIELDS},
+            'is_subscribed': author.get('is_subscribed', False),
+            'avatar': avatar,
+            'avatar_renditions': avatar_renditions,
+        }
+    serialized = []
+    for id in ids:
+        recipe = recipes[id]
+        image, image_renditions = image_urls(
+            request, RECIPE_IMAGE, recipe['image'],
+            recipe['image_renditions_name'],
+        )
+        serialized.append({
+            'id': id,
+            'tags': [dict(tag) for _, tag in sorted(tags[id])],
+            'image': image,
+            'author': serialized_authors[recipe['author_id']],
+            'ingredients': ingredients[id],
+            'name': recipe['name'],
+            'text': recipe['text'],
+            'cooking_time': recipe['cooking_time'],
+            'is_favorited': recipe.get('is_favorited', False),
+            'is_in_shopping_cart': recipe.get('is_in_shopping_cart', False),
+            'image_renditions': image_renditions,
+        })
+    return serialized
@@ -1,13 +1,15 @@
+from django.db.models import Exists, OuterRef
 from django_filters.rest_framework import filters, FilterSet
 
-from recipes.models import Recipe, Tag
+from api.catalog import tag_choices, tag_ids
+from recipes.models import Recipe
+from recipes.search import search_recipes
 
 
 class RecipeFilter(FilterSet):
-    tags = filters.ModelMultipleChoiceFilter(
-        queryset=Tag.objects.all(),
-        field_name='tags__slug',
-        to_field_name='slug',
+    tags = filters.MultipleChoiceFilter(
+        choices=tag_choices,
+        method='get_tags',
     )
     is_favorited = filters.BooleanFilter(
         method='get_is_favorited'
@@ -15,10 +17,19 @@ class RecipeFilter(FilterSet):
     is_in_shopping_cart = filters.BooleanFilter(
         method='get_is_in_shopping_cart'
     )
+    search = filters.CharFilter(method='get_search')
 
     class Meta:
         model = Recipe
-        fields = ('author', 'tags', 'is_favorited', 'is_in_shopping_cart')
+        fields = (
+            'author', 'tags', 'is_favorited', 'is_in_shopping_cart', 'search'
+        )
+
+    def get_tags(self, recipes, name, value):
+        ids = tag_ids.get()
+        return recipes.filter(Exists(Recipe.tags.through.objects.filter(
+            recipe=OuterRef('pk'), tag_id__in=[ids[slug] for slug in value]
+        )))
 
     def get_is_favorited(self, recipes, name, value):
         if self.request.user.is_authenticated and value:
@@ -29,3 +40,6 @@ class RecipeFilter(FilterSet):
         if self.request.user.is_authenticated and value:
             return recipes.filter(shoppingcarts__user=self.request.user)
         return recipes
+
+    def get_search(self, recipes, name, value):
+        return search_recipes(recipes, value)
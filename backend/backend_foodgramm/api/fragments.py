@@ -0,0 +1,140 @@
+from uuid import uuid4
+
+from django.core.cache import caches
+from django.db.models import IntegerField, Value
+from django.http import HttpResponse
+from rest_framework.renderers import JSONRenderer
+
+from api.cache import get_version
+from api.compiled import serialize_recipes
+from api.metrics import TimedJSONRenderer, timed
+from recipes.models import Favorite, Follow, Recipe, ShoppingCart
+
+RESULTS_MARKER = f'results-{uuid4().hex}'
+FRAGMENT_KEY = 'fragment:{host}:{id}:{version}:{tags}:{ingredients}'
+FLAGS = ('is_subscribed', 'is_favorited', 'is_in_shopping_cart')
+# Метки на месте пользовательских флагов: uuid не может совпасть с
+# содержимым рецепта, поэтому фрагмент режется по ним однозначно.
+MARKERS = {flag: f'{flag}-{uuid4().hex}' for flag in FLAGS}
+FLAG_VALUES = {True: b'true', False: b'false'}
+
+fragment_cache = caches['fragments']
+
+
+def build_fragment(recipe):
+    content = JSONRenderer().render({
+        **recipe,
+        'author': {
+            **recipe['author'], 'is_subscribed': MARKERS['is_subscribed']
+        },
+        'is_favorited': MARKERS['is_favorited'],
+        'is_in_shopping_cart': MARKERS['is_in_shopping_cart'],
+    })
+    parts = []
+    for flag in FLAGS:
+        part, _, content = content.partition(f'"{MARKERS[flag]}"'.encode())
+        parts.append(part)
+    parts.append(content)
+    return recipe['author']['id'], tuple(parts)
+
+
+def get_flags(user, recipe_ids, author_ids):
+    if not user.is_authenticated:
+        return set()
+    return set(
+        Follow.objects.filter(
+            user=user, following_id__in=author_ids
+        ).annotate(flag=Value(0, IntegerField())).values_list(
+            'flag', 'following_id'
+        ).order_by().union(
+            *(
+                model.objects.filter(
+                    user=user, recipe_id__in=recipe_ids
+                ).annotate(flag=Value(number, IntegerField())).values_list(
+                    'flag', 'recipe_id'
+                ).order_by()
+                for number, model in ((1, Favorite), (2, ShoppingCart))
+            ),
+            all=True,
+        )
+    )
+
+
+def render_recipes(rows, request):
+    # JSON-массив рецептов страницы, побайтно совпадающий с
+    # ResipesReadSerializer: общие части берутся из кеша одним запросом,
+    # флаги пользователя подставляются на свои места.
+    versions = get_version('tags'), get_version('ingredients')
+    host = request.build_absolute_uri('/')
+    keys = {
+        row['id']: FRAGMENT_KEY.format(
+            host=host, id=row['id'], version=row['version'],
+            tags=versions[0], ingredients=versions[1],
+        )
+        for row in rows
+    }
+    fragments = fragment_cache.get_many(keys.values())
+    missing = [id for id, key in keys.items() if key not in fragments]
+    if missing:
+        built = {
+            keys[recipe['id']]: build_fragment(recipe)
+            for recipe in serialize_recipes(missing, request)
+        }
+        fragment_cache.set_many(built)
+        fragments.update(built)
+    fragments = [fragments[keys[row['id']]] for row in rows]
+    flags = get_flags(
+        request.user,
+        list(keys),
+        {author_id for author_id, _ in fragments},
+    )
+    return b'[' + b','.join(
+        b''.join((
+            parts[0],
+            FLAG_VALUES[(0, author_id) in flags],
+            parts[1],
+            FLAG_VALUES[(1, row['id']) in flags],
+            parts[2],
+            FLAG_VALUES[(2, row['id']) in flags],
+            parts[3],
+        ))
+        for row, (author_id, parts) in zip(rows, fragments)
+    ) + b']'
+
+
+class CompiledRecipeListMixin:
+
+    def paginate_rows(self, recipes, paginator):
+        return paginator.paginate_queryset(
+            recipes.values('id', 'created_at', 'version'),
+            self.request,
+            view=self,
+        )
+
+    def compiled_response(self, rows, paginator):
+        request = self.request
+        if (request.accepted_renderer.format != 'json'
+                or 'indent' in request.accepted_media_type):
+            return paginator.get_paginated_response(
+                timed('serializer', serialize_recipes)(
+                    [row['id'] for row in rows], request
+                )
+            )
+        # Обёртка пагинации рендерится с меткой вместо списка рецептов,
+        # метка заменяется уже собранным массивом.
+        envelope = TimedJSONRenderer().render(
+            paginator.get_paginated_response(RESULTS_MARKER).data
+        )
+        head, _, tail = envelope.rpartition(f'"{RESULTS_MARKER}"'.encode())
+        return HttpResponse(
+            head + timed('render', render_recipes)(rows, request) + tail,
+            content_type='application/json',
+        )
+
+    def list(self, request, *args, **kwargs):
+        return self.compiled_response(
+            self.paginate_rows(
+                self.filter_queryset(Recipe.objects.all()), self.paginator
+            ),
+            self.paginator,
+        )
@@ -0,0 +1,58 @@
+from bisect import bisect_left
+from itertools import islice
+
+from api.cache import get_version
+from recipes.models import Ingredient
+
+
+def normalize(name):
+    return name.casefold()
+
+
+class IngredientsIndex:
+
+    def __init__(self):
+        self.index = None
+        self.version = None
+
+    def build(self):
+        rows = sorted(
+            (normalize(name), id, name, measurement_unit)
+            for id, name, measurement_unit in Ingredient.objects.values_list(
+                'id', 'name', 'measurement_unit'
+            )
+        )
+        return (
+            [key for key, *_ in rows],
+            [
+                {'id': id, 'name': name, 'measurement_unit': measurement_unit}
+                for _, id, name, measurement_unit in rows
+            ],
+        )
+
+    def get_index(self):
+        version = get_version('ingredients')
+        index = self.index
+        if index is None or self.version != version:
+            index = self.index = self.build()
+            self.version = version
+        return index
+
+    def search(self, prefix, limit):
+        # Ключи отсортированы, поэтому точное совпадение всегда идёт
+        # раньше остальных названий с тем же префиксом.
+        keys, ingredients = self.get_index()
+        prefix = normalize(prefix)
+        start = bisect_left(keys, prefix)
+        found = []
+        for key, ingredient in zip(
+            islice(keys, start, start + limit),
+            islice(ingredients, start, start + limit),
+        ):
+            if not key.startswith(prefix):
+                break
+            found.append(ingredient)
+        return found
+
+
+ingredients_index = IngredientsIndex()
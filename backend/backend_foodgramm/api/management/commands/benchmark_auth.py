@@ -0,0 +1,46 @@
+from unittest import mock
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.test import override_settings
+from rest_framework.authentication import TokenAuthentication
+
+from api.authentication import CachedTokenAuthentication, token_cache
+from api.benchmark import create_client, format_result, measure
+from api.views import ResipesViewSet
+
+URL = '/api/recipes/'
+
+
+class Command(BaseCommand):
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat', type=int, default=200)
+
+    @override_settings(ALLOWED_HOSTS=['*'])
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            user, client = create_client('benchmark_auth')
+            results = {}
+            for name, authentication in (
+                ('TokenAuthentication', TokenAuthentication),
+                ('CachedTokenAuthentication', CachedTokenAuthentication),
+            ):
+                with mock.patch.object(
+                    ResipesViewSet, 'authentication_classes',
+                    [authentication],
+                ):
+                    client.get(URL)
+                    results[name] = measure(
+                        client, [URL], options['repeat']
+                    )
+                print(format_result(name, results[name]))
+            token_cache.delete_user(user.pk)
+            transaction.set_rollback(True)
+        plain = results['TokenAuthentication']
+        cached = results['CachedTokenAuthentication']
+        print(
+            f'Экономия на запрос: '
+            f'{plain["queries"] - cached["queries"]} SQL-запросов, '
+            f'p50 {plain["p50"] - cached["p50"]:.2f} мс'
+        )
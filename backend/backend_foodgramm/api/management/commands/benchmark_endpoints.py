@@ -0,0 +1,125 @@
+import json
+from urllib.parse import urlencode
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test import Client, override_settings
+from rest_framework.authtoken.models import Token
+
+from api.authentication import token_cache
+from api.benchmark import format_result, measure
+from recipes.models import Ingredient, Recipe, Tag, User
+
+
+class Command(BaseCommand):
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat', type=int, default=100)
+        parser.add_argument('--username', default='bench-0')
+        parser.add_argument('--output')
+        parser.add_argument('--baseline')
+        parser.add_argument(
+            '--tolerance', type=float, default=0.25,
+            help='Допустимый относительный рост p95',
+        )
+        parser.add_argument(
+            '--query-tolerance', type=int, default=0,
+            help='Допустимый рост числа SQL-запросов',
+        )
+
+    def get_scenarios(self):
+        tags = urlencode(
+            {'tags': list(Tag.objects.values_list('slug', flat=True)[:2])},
+            doseq=True,
+        )
+        recipe_ids = list(Recipe.objects.values_list('id', flat=True)[:20])
+        prefixes = {
+            name[:3] for name in
+            Ingredient.objects.values_list('name', flat=True)[:50]
+        }
+        return {
+            'recipes_anonymous': (False, ['/api/recipes/']),
+            'recipes_anonymous_filtered': (
+                False, [f'/api/recipes/?{tags}&page=2']
+            ),
+            'recipes_authenticated': (True, ['/api/recipes/']),
+            'recipes_authenticated_filtered': (
+                True, [f'/api/recipes/?{tags}&is_favorited=1']
+            ),
+            'recipe_detail': (
+                True, [f'/api/recipes/{id}/' for id in recipe_ids]
+            ),
+            'subscriptions': (
+                True, ['/api/users/subscriptions/?recipes_limit=3']
+            ),
+            'download_shopping_cart': (
+                True, ['/api/recipes/download_shopping_cart/']
+            ),
+            'ingredients_search': (False, [
+                f'/api/ingredients/?{urlencode({"name": prefix})}'
+                for prefix in sorted(prefixes)
+            ]),
+        }
+
+    def compare(self, results, baseline, options):
+        regressions = []
+        for name, result in results.items():
+            expected = baseline.get(name)
+            if expected is None:
+                continue
+            if result['queries'] > (
+                expected['queries'] + options['query_tolerance']
+            ):
+                regressions.append(
+                    f'{name}: запросов {result["queries"]} '
+                    f'вместо {expected["queries"]}'
+                )
+            if result['p95'] > expected['p95'] * (1 + options['tolerance']):
+                regressions.append(
+                    f'{name}: p95 {result["p95"]:.2f} мс '
+                    f'вместо {expected["p95"]:.2f} мс'
+                )
+        return regressions
+
+    @override_settings(ALLOWED_HOSTS=['*'])
+    def handle(self, *args, **options):
+        user = User.objects.filter(username=options['username']).first()
+        if user is None:
+            raise CommandError(
+                f'Нет пользователя {options["username"]}, '
+                'сначала выполните benchmark_seed'
+            )
+        results = {}
+        with transaction.atomic():
+            token, _ = Token.objects.get_or_create(user=user)
+            clients = {
+                False: Client(),
+                True: Client(HTTP_AUTHORIZATION=f'Token {token.key}'),
+            }
+            for name, (authenticated, urls) in self.get_scenarios().items():
+                client = clients[authenticated]
+                for url in urls:
+                    client.get(url)
+                results[name] = measure(client, urls, options['repeat'])
+                print(format_result(name, results[name]))
+            token_cache.delete_user(user.pk)
+            transaction.set_rollback(True)
+        report = {
+            'vendor': connection.vendor,
+            'repeat': options['repeat'],
+            'recipes': Recipe.objects.count(),
+            'results': results,
+        }
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as file:
+                json.dump(report, file, ensure_ascii=False, indent=2)
+        if options['baseline']:
+            with open(options['baseline'], encoding='utf-8') as file:
+                regressions = self.compare(
+                    results, json.load(file)['results'], options
+                )
+            if regressions:
+                raise CommandError(
+                    'Регрессия производительности:\n' + '\n'.join(regressions)
+                )
+            print('Регрессий относительно базовой линии нет')
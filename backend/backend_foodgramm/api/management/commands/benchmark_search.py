@@ -0,0 +1,89 @@
+import random
+from time import perf_counter
+from urllib.parse import urlencode
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.test import override_settings
+
+from api.authentication import token_cache
+from api.benchmark import create_client, format_result, measure
+from recipes.models import Recipe
+
+WORDS = (
+    'борщ', 'суп', 'салат', 'пирог', 'блины', 'каша', 'котлеты', 'рагу',
+    'плов', 'омлет', 'запеканка', 'пельмени', 'вареники', 'щи', 'соус',
+    'курица', 'говядина', 'свинина', 'рыба', 'лосось', 'грибы', 'картофель',
+    'морковь', 'капуста', 'свёкла', 'лук', 'чеснок', 'томаты', 'сыр',
+    'творог', 'сметана', 'молоко', 'яйца', 'мука', 'рис', 'гречка',
+    'овсянка', 'яблоки', 'вишня', 'малина', 'шоколад', 'мёд', 'орехи',
+    'запечь', 'обжарить', 'отварить', 'тушить', 'нарезать', 'смешать',
+    'быстрый', 'домашний', 'праздничный', 'постный', 'острый', 'сладкий',
+)
+# Словарь описаний: настоящие слова и их синтетические формы с
+# распределением Ципфа, чтобы частоты слов были похожи на живой текст.
+VOCABULARY = WORDS + tuple(
+    f'{word}{number}' for number in range(100) for word in WORDS
+)
+WEIGHTS = tuple(1 / rank for rank in range(1, len(VOCABULARY) + 1))
+QUERIES = (
+    'борщ', 'курица грибы', 'пирог вишня', 'домашний сыр', 'постный суп',
+    'запеканка творог', 'лосось', 'острый соус', 'блин', 'гречка лук',
+)
+
+
+class Command(BaseCommand):
+
+    def add_arguments(self, parser):
+        parser.add_argument('--size', type=int, default=1000000)
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--repeat', type=int, default=100)
+        parser.add_argument('--seed', type=int, default=0)
+
+    def build_corpus(self, author, size, batch_size, seed):
+        generator = random.Random(seed)
+        vocabulary = list(VOCABULARY)
+        generator.shuffle(vocabulary)
+        start = perf_counter()
+        for offset in range(0, size, batch_size):
+            Recipe.objects.bulk_create(
+                Recipe(
+                    author=author,
+                    name=' '.join(generator.choices(WORDS, k=3)),
+                    text=' '.join(generator.choices(
+                        vocabulary, WEIGHTS, k=30
+                    )),
+                    cooking_time=generator.randint(1, 180),
+                    image='recipes/images/benchmark.png',
+                )
+                for _ in range(min(batch_size, size - offset))
+            )
+        print(
+            f'Корпус из {size} рецептов построен '
+            f'за {perf_counter() - start:.1f} с'
+        )
+
+    @override_settings(ALLOWED_HOSTS=['*'])
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            user, client = create_client('benchmark_search')
+            self.build_corpus(
+                user, options['size'], options['batch_size'], options['seed']
+            )
+            urls = [
+                f'/api/recipes/?{urlencode({"search": query})}'
+                for query in QUERIES
+            ]
+            client.get(urls[0])
+            print(format_result(
+                'search', measure(client, urls, options['repeat'])
+            ))
+            print(format_result(
+                'search + cursor', measure(
+                    client,
+                    [f'{url}&pagination=cursor' for url in urls],
+                    options['repeat'],
+                )
+            ))
+            token_cache.delete_user(user.pk)
+            transaction.set_rollback(True)
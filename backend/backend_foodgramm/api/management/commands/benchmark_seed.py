@@ -0,0 +1,136 @@
+import random
+from itertools import islice
+
+from django.contrib.auth.hashers import make_password
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from api.cache import bump_version
+from recipes.counters import recount_counters
+from recipes.models import (
+    Favorite, Follow, Ingredient, Recipe, RecipeIngredient, ShoppingCart,
+    Tag, User
+)
+from recipes.shopping_cart import rebuild_totals
+from recipes.timeline import rebuild
+
+PASSWORD = 'benchmark-password'
+WORDS = (
+    'борщ', 'суп', 'салат', 'пирог', 'блины', 'каша', 'котлеты', 'рагу',
+    'плов', 'омлет', 'запеканка', 'пельмени', 'курица', 'рыба', 'грибы',
+    'домашний', 'быстрый', 'праздничный', 'постный', 'острый', 'сладкий',
+)
+
+
+def bulk_create(model, objects, batch_size):
+    # bulk_create сам собирает весь итератор в список, поэтому режем
+    # его на пачки здесь.
+    objects = iter(objects)
+    while True:
+        batch = list(islice(objects, batch_size))
+        if not batch:
+            return
+        model.objects.bulk_create(batch, ignore_conflicts=True)
+
+
+class Command(BaseCommand):
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--recipes', type=int, default=10000)
+        parser.add_argument('--ingredients-per-recipe', type=int, default=8)
+        parser.add_argument('--follows', type=int, default=20)
+        parser.add_argument('--favorites', type=int, default=20)
+        parser.add_argument('--carts', type=int, default=5)
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--prefix', default='bench')
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        prefix = options['prefix']
+        batch_size = options['batch_size']
+        if User.objects.filter(username=f'{prefix}-0').exists():
+            raise CommandError(
+                f'Пользователи {prefix}-* уже созданы, укажите другой --prefix'
+            )
+        call_command('tags_load')
+        call_command('ingredients_load')
+        generator = random.Random(options['seed'])
+        tag_ids = list(Tag.objects.values_list('id', flat=True))
+        ingredient_ids = list(Ingredient.objects.values_list('id', flat=True))
+        password = make_password(PASSWORD)
+        with transaction.atomic():
+            bulk_create(User, (
+                User(
+                    username=f'{prefix}-{number}',
+                    email=f'{prefix}-{number}@example.com',
+                    first_name=prefix,
+                    last_name=str(number),
+                    password=password,
+                )
+                for number in range(options['users'])
+            ), batch_size)
+            user_ids = list(User.objects.filter(
+                username__startswith=f'{prefix}-'
+            ).values_list('id', flat=True))
+            bulk_create(Recipe, (
+                Recipe(
+                    author_id=generator.choice(user_ids),
+                    name=' '.join(generator.choices(WORDS, k=3)),
+                    text=' '.join(generator.choices(WORDS, k=30)),
+                    cooking_time=generator.randint(1, 180),
+                    image='recipes/images/benchmark.png',
+                )
+                for _ in range(options['recipes'])
+            ), batch_size)
+            recipe_ids = list(Recipe.objects.filter(
+                author_id__in=user_ids
+            ).values_list('id', flat=True))
+            bulk_create(RecipeIngredient, (
+                RecipeIngredient(
+                    recipe_id=recipe_id,
+                    ingredient_id=ingredient_id,
+                    amount=generator.randint(1, 500),
+                )
+                for recipe_id in recipe_ids
+                for ingredient_id in generator.sample(
+                    ingredient_ids, options['ingredients_per_recipe']
+                )
+            ), batch_size)
+            bulk_create(Recipe.tags.through, (
+                Recipe.tags.through(recipe_id=recipe_id, tag_id=tag_id)
+                for recipe_id in recipe_ids
+                for tag_id in generator.sample(
+                    tag_ids, generator.randint(1, min(3, len(tag_ids)))
+                )
+            ), batch_size)
+            bulk_create(Follow, (
+                Follow(user_id=user_id, following_id=following_id)
+                for user_id in user_ids
+                for following_id in generator.sample(
+                    user_ids, min(options['follows'], len(user_ids))
+                )
+                if following_id != user_id
+            ), batch_size)
+            for model, count in (
+                (Favorite, options['favorites']),
+                (ShoppingCart, options['carts']),
+            ):
+                bulk_create(model, (
+                    model(user_id=user_id, recipe_id=recipe_id)
+                    for user_id in user_ids
+                    for recipe_id in generator.sample(
+                        recipe_ids, min(count, len(recipe_ids))
+                    )
+                ), batch_size)
+            recount_counters()
+            rebuild_totals(user_ids)
+            rebuild()
+        # bulk_create не отправляет сигналы. Версия хранится в общем кеше,
+        # поэтому запущенный сервер сбрасывает закешированные ответы.
+        bump_version('recipes')
+        print(
+            f'Созданы пользователи {prefix}-0…{prefix}-{len(user_ids) - 1} '
+            f'(пароль {PASSWORD}) и {len(recipe_ids)} рецептов'
+        )
@@ -0,0 +1,165 @@
+import shlex
+import socket
+import subprocess
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from http.client import HTTPConnection
+from time import perf_counter, sleep
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.authtoken.models import Token
+
+from api.benchmark import percentile
+from recipes.models import Ingredient, Recipe, User
+
+SERVERS = {
+    'wsgi': 'gunicorn --workers {workers} --bind {host}:{port} '
+            'backend_foodgramm.wsgi',
+    'asgi': 'uvicorn --workers {workers} --host {host} --port {port} '
+            'backend_foodgramm.asgi:application',
+}
+HOST = '127.0.0.1'
+
+
+def wait_for_port(port, timeout=30):
+    start = perf_counter()
+    while perf_counter() - start < timeout:
+        try:
+            socket.create_connection((HOST, port), timeout=1).close()
+            return
+        except OSError:
+            sleep(0.2)
+    raise CommandError(f'Сервер не запустился на порту {port}')
+
+
+def fetch(port, url, headers):
+    connection = HTTPConnection(HOST, port, timeout=10)
+    start = perf_counter()
+    try:
+        connection.request('GET', url, headers=headers)
+        response = connection.getresponse()
+        response.read()
+        return response.status, perf_counter() - start
+    except OSError:
+        return None, perf_counter() - start
+    finally:
+        connection.close()
+
+
+def slow_upload(port, token, stop):
+    # Клиент на медленном канале: тело запроса приходит по байту.
+    with socket.create_connection((HOST, port)) as client:
+        client.sendall(
+            'PUT /api/users/me/avatar/ HTTP/1.1\r\n'
+            f'Host: {HOST}\r\n'
+            f'Authorization: Token {token}\r\n'
+            'Content-Type: application/json\r\n'
+            'Content-Length: 1000000\r\n\r\n'.encode()
+        )
+        while not stop.wait(0.5):
+            try:
+                client.sendall(b' ')
+            except OSError:
+                return
+
+
+class Command(BaseCommand):
+
+    def add_arguments(self, parser):
+        parser.add_argument('--modes', nargs='+', choices=SERVERS,
+                            default=list(SERVERS))
+        parser.add_argument('--workers', type=int, default=2)
+        parser.add_argument('--port', type=int, default=8800)
+        parser.add_argument('--concurrency', type=int, default=16)
+        parser.add_argument('--requests', type=int, default=500)
+        parser.add_argument(
+            '--slow-clients', type=int, default=0,
+            help='Клиенты, медленно загружающие тело запроса во время замера',
+        )
+        parser.add_argument('--username', default='bench-0')
+
+    def get_scenarios(self, token):
+        recipe_id = Recipe.objects.values_list('id', flat=True).first()
+        prefix = (Ingredient.objects.values_list(
+            'name', flat=True
+        ).first() or '')[:3]
+        authenticated = {'Authorization': f'Token {token}'}
+        return {
+            'short_link': (f'/s/{recipe_id}', {}),
+            'tags': ('/api/tags/', {}),
+            'ingredients_search': (
+                f'/api/ingredients/?{urlencode({"name": prefix})}', {}
+            ),
+            'recipes_anonymous': ('/api/recipes/', {}),
+            'recipes_authenticated': ('/api/recipes/', authenticated),
+            'download_shopping_cart': (
+                '/api/recipes/download_shopping_cart/', authenticated
+            ),
+        }
+
+    def load(self, port, url, headers, options):
+        start = perf_counter()
+        with ThreadPoolExecutor(options['concurrency']) as pool:
+            results = list(pool.map(
+                lambda _: fetch(port, url, headers),
+                range(options['requests']),
+            ))
+        elapsed = perf_counter() - start
+        durations = [duration * 1000 for _, duration in results]
+        return {
+            'rps': len(results) / elapsed,
+            'errors': sum(
+                status is None or status >= 500 for status, _ in results
+            ),
+            'p50': percentile(durations, 50),
+            'p95': percentile(durations, 95),
+        }
+
+    def handle(self, *args, **options):
+        user = User.objects.filter(username=options['username']).first()
+        if user is None:
+            raise CommandError(
+                f'Нет пользователя {options["username"]}, '
+                'сначала выполните benchmark_seed'
+            )
+        token, _ = Token.objects.get_or_create(user=user)
+        scenarios = self.get_scenarios(token.key)
+        for number, mode in enumerate(options['modes']):
+            port = options['port'] + number
+            server = subprocess.Popen(
+                shlex.split(SERVERS[mode].format(
+                    workers=options['workers'], host=HOST, port=port
+                )),
+                cwd=settings.BASE_DIR,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+            )
+            stop = threading.Event()
+            try:
+                wait_for_port(port)
+                slow_clients = [
+                    threading.Thread(
+                        target=slow_upload,
+                        args=(port, token.key, stop),
+                        daemon=True,
+                    )
+                    for _ in range(options['slow_clients'])
+                ]
+                for client in slow_clients:
+                    client.start()
+                sleep(1 if slow_clients else 0)
+                for name, (url, headers) in scenarios.items():
+                    fetch(port, url, headers)
+                    result = self.load(port, url, headers, options)
+                    print(
+                        f'{mode} {name}: {result["rps"]:.0f} запросов/с, '
+                        f'p50 {result["p50"]:.2f} мс, '
+                        f'p95 {result["p95"]:.2f} мс, '
+                        f'ошибок {result["errors"]}'
+                    )
+            finally:
+                stop.set()
+                server.terminate()
+                server.wait()
@@ -0,0 +1,205 @@
+from bisect import bisect_left
+from collections import defaultdict
+from contextvars import ContextVar
+from functools import wraps
+from threading import Lock
+from time import perf_counter
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connection
+from rest_framework.renderers import JSONRenderer
+
+from recipes.asynchronous import execute_wrappers
+
+DURATION_BUCKETS = (
+    0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10
+)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+PHASES = ('total', 'db', 'serializer', 'render')
+
+current = ContextVar('request_metrics', default=None)
+
+
+class RequestMetrics:
+
+    def __init__(self):
+        self.durations = dict.fromkeys(PHASES, 0.0)
+        self.queries = 0
+        self.depth = 0
+
+    def record_query(self, execute, sql, params, many, context):
+        start = perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.durations['db'] += perf_counter() - start
+            self.queries += 1
+
+    def server_timing(self):
+        return ', '.join(
+            f'{phase};desc="{self.queries} queries";dur={duration * 1000:.2f}'
+            if phase == 'db' else f'{phase};dur={duration * 1000:.2f}'
+            for phase, duration in self.durations.items()
+        )
+
+
+def timed(phase, function):
+    # Вложенные вызовы (сериализатор внутри сериализатора) не
+    # учитываются повторно: время считается только у внешнего.
+    @wraps(function)
+    def wrapper(*args, **kwargs):
+        metrics = current.get()
+        if metrics is None or metrics.depth:
+            return function(*args, **kwargs)
+        metrics.depth += 1
+        start = perf_counter()
+        try:
+            return function(*args, **kwargs)
+        finally:
+            metrics.durations[phase] += perf_counter() - start
+            metrics.depth -= 1
+    return wrapper
+
+
+class TimedSerializerMixin:
+    # Время сериализаторов, которыми пользуются представления;
+    # вложенные учитываются внутри внешнего.
+
+    def is_valid(self, *args, **kwargs):
+        return timed('serializer', super().is_valid)(*args, **kwargs)
+
+    def to_representation(self, instance):
+        return timed('serializer', super().to_representation)(instance)
+
+
+class TimedJSONRenderer(JSONRenderer):
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return timed('render', super().render)(
+            data, accepted_media_type, renderer_context
+        )
+
+
+class Histogram:
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def lines(self, name, labels):
+        cumulative = 0
+        for bound, count in zip(
+            (*map(str, self.buckets), '+Inf'), self.counts
+        ):
+            cumulative += count
+            yield f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}'
+        yield f'{name}_sum{{{labels}}} {self.sum}'
+        yield f'{name}_count{{{labels}}} {self.count}'
+
+
+class Registry:
+
+    def __init__(self):
+        self.lock = Lock()
+        self.durations = defaultdict(lambda: Histogram(DURATION_BUCKETS))
+        self.queries = defaultdict(lambda: Histogram(QUERY_BUCKETS))
+
+    def observe(self, route, metrics):
+        with self.lock:
+            for phase, duration in metrics.durations.items():
+                self.durations[route, phase].observe(duration)
+            self.queries[route].observe(metrics.queries)
+
+    def render(self):
+        lines = [
+            '# HELP foodgram_request_duration_seconds '
+            'Время обработки запроса по этапам.',
+            '# TYPE foodgram_request_duration_seconds histogram',
+        ]
+        with self.lock:
+            for (route, phase), histogram in sorted(self.durations.items()):
+                lines.extend(histogram.lines(
+                    'foodgram_request_duration_seconds',
+                    f'route="{route}",phase="{phase}"',
+                ))
+            lines.extend((
+                '# HELP foodgram_request_queries SQL-запросов на запрос.',
+                '# TYPE foodgram_request_queries histogram',
+            ))
+            for route, histogram in sorted(self.queries.items()):
+                lines.extend(histogram.lines(
+                    'foodgram_request_queries', f'route="{route}"'
+                ))
+        return '\n'.join(lines) + '\n'
+
+
+registry = Registry()
+
+
+def get_route(request, view):
+    view_class = getattr(view, 'cls', None)
+    if view_class is None:
+        return request.resolver_match.view_name
+    actions = getattr(view, 'actions', None) or {}
+    return '{}.{}'.format(
+        view_class.__name__,
+        actions.get(request.method.lower(), request.method.lower()),
+    )
+
+
+class RequestMetricsMiddleware:
+
+    def __init__(self, get_response):
+        if not settings.METRICS_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        metrics = RequestMetrics()
+        token = current.set(metrics)
+        wrappers_token = execute_wrappers.set(
+            (*execute_wrappers.get(), metrics.record_query)
+        )
+        start = perf_counter()
+        try:
+            with connection.execute_wrapper(metrics.record_query):
+                response = self.get_response(request)
+        finally:
+            execute_wrappers.reset(wrappers_token)
+            current.reset(token)
+        route = getattr(request, 'metrics_route', 'unmatched')
+        metrics.durations['total'] = perf_counter() - start
+        response['Server-Timing'] = metrics.server_timing()
+        if response.streaming:
+            # Тело формируется уже после заголовков: Server-Timing
+            # описывает время до первого байта, а в гистограммы попадает
+            # весь запрос вместе с отдачей тела.
+            response.streaming_content = self.stream(
+                response.streaming_content, metrics, route, start
+            )
+        else:
+            registry.observe(route, metrics)
+        return response
+
+    @staticmethod
+    def stream(content, metrics, route, start):
+        content = iter(content)
+        while True:
+            with connection.execute_wrapper(metrics.record_query):
+                chunk = next(content, None)
+            if chunk is None:
+                break
+            yield chunk
+        metrics.durations['total'] = perf_counter() - start
+        registry.observe(route, metrics)
+
+    def process_view(self, request, view, view_args, view_kwargs):
+        request.metrics_route = get_route(request, view)
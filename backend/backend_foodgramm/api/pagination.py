@@ -1,7 +1,41 @@
-from rest_framework.pagination import PageNumberPagination
+from rest_framework.pagination import CursorPagination, PageNumberPagination
 from django.conf import settings
 
 
 class LimitPagination(PageNumberPagination):
     page_size = settings.PAGE_SIZE
     page_size_query_param = 'limit'
+
+
+class RecipeCursorPagination(CursorPagination):
+    page_size = settings.PAGE_SIZE
+    page_size_query_param = 'limit'
+    ordering = ('-created_at', '-id')
+
+
+class RecipePagination(LimitPagination):
+    mode_query_param = 'pagination'
+    cursor_mode = 'cursor'
+
+    def __init__(self):
+        self.cursor_pagination = None
+
+    def use_cursor(self, request):
+        return (
+            request.query_params.get(self.mode_query_param) == self.cursor_mode
+            or RecipeCursorPagination.cursor_query_param
+            in request.query_params
+        )
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if self.use_cursor(request):
+            self.cursor_pagination = RecipeCursorPagination()
+            return self.cursor_pagination.paginate_queryset(
+                queryset, request, view
+            )
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.cursor_pagination:
+            return self.cursor_pagination.get_paginated_response(data)
+        return super().get_paginated_response(data)
@@ -1,21 +1,178 @@
+import csv
 from datetime import date
+from itertools import islice
 
 WORKPIECE_INGREDIENTS = ' {index}.{name} - {amount}, {measurement_unit}'
 WORKPIECE_RECIPES = ' {index}.{name}'
+PDF_PAGE_WIDTH = 595
+PDF_PAGE_HEIGHT = 842
+PDF_MARGIN = 50
+PDF_FONT_SIZE = 11
+PDF_LEADING = 14
+PDF_LINES_PER_PAGE = (PDF_PAGE_HEIGHT - 2 * PDF_MARGIN) // PDF_LEADING
+PDF_ENCODING = 'cp1251'
 
 
-def render_shopping_list(ingredients, recipes):
-    return '\n'.join((
-        f'Список покупок. {date.today()}',
-        'Продукты:',
-        *(WORKPIECE_INGREDIENTS.format(
+def shopping_list_lines(ingredients, recipes):
+    yield f'Список покупок. {date.today()}'
+    yield 'Продукты:'
+    for index, ingredient in enumerate(ingredients, start=1):
+        yield WORKPIECE_INGREDIENTS.format(
             index=index,
             name=ingredient['ingredient__name'].capitalize(),
             amount=ingredient['ingredient_amount'],
             measurement_unit=ingredient['ingredient__measurement_unit']
-        ) for index, ingredient in enumerate(ingredients, start=1)),
-        'Рецепты:',
-        *(WORKPIECE_RECIPES.format(
-            index=index, name=recipe.recipe.name
-        ) for index, recipe in enumerate(recipes, start=1))
-    ))
+        )
+    yield 'Рецепты:'
+    for index, name in enumerate(recipes, start=1):
+        yield WORKPIECE_RECIPES.format(index=index, name=name)
+
+
+class TextShoppingListRenderer:
+    extension = 'txt'
+    content_type = 'text/plain; charset=utf-8'
+
+    def render(self, ingredients, recipes):
+        for line in shopping_list_lines(ingredients, recipes):
+            yield f'{line}\n'
+
+
+class Echo:
+    def write(self, value):
+        return value
+
+
+class CSVShoppingListRenderer:
+    extension = 'csv'
+    content_type = 'text/csv; charset=utf-8'
+
+    def render(self, ingredients, recipes):
+        writer = csv.writer(Echo())
+        yield '\ufeff'
+        yield writer.writerow(('Продукт', 'Количество', 'Единица измерения'))
+        for ingredient in ingredients:
+            yield writer.writerow((
+                ingredient['ingredient__name'].capitalize(),
+                ingredient['ingredient_amount'],
+                ingredient['ingredient__measurement_unit'],
+            ))
+
+
+class PDFShoppingListRenderer:
+    extension = 'pdf'
+    content_type = 'application/pdf'
+
+    @staticmethod
+    def encoding_differences():
+        return ' '.join(
+            f'/uni{ord(char):04X}'
+            for char in bytes(range(128, 256)).decode(
+                PDF_ENCODING, errors='replace'
+            )
+        )
+
+    @staticmethod
+    def to_unicode_cmap():
+        codes = [
+            f'<{code:02X}> <{ord(char):04X}>'
+            for code, char in enumerate(
+                bytes(range(32, 256)).decode(PDF_ENCODING, errors='replace'),
+                start=32,
+            )
+        ]
+        return '\n'.join((
+            '/CIDInit /ProcSet findresource begin 12 dict begin begincmap',
+            '/CIDSystemInfo << /Registry (Adobe) /Ordering (UCS) '
+            '/Supplement 0 >> def',
+            '/CMapName /Adobe-Identity-UCS def /CMapType 2 def',
+            '1 begincodespacerange <00> <FF> endcodespacerange',
+            *(
+                f'{len(codes[start:start + 100])} beginbfchar\n'
+                + '\n'.join(codes[start:start + 100])
+                + '\nendbfchar'
+                for start in range(0, len(codes), 100)
+            ),
+            'endcmap CMapName currentdict /CMap defineresource pop end end',
+        )).encode()
+
+    @staticmethod
+    def escape(line):
+        return line.encode(PDF_ENCODING, errors='replace').replace(
+            b'\\', b'\\\\'
+        ).replace(b'(', b'\\(').replace(b')', b'\\)')
+
+    def page_content(self, lines):
+        return b''.join((
+            b'BT /F1 %d Tf %d TL %d %d Td\n' % (
+                PDF_FONT_SIZE, PDF_LEADING,
+                PDF_MARGIN, PDF_PAGE_HEIGHT - PDF_MARGIN,
+            ),
+            *(b'(%s) Tj T*\n' % self.escape(line) for line in lines),
+            b'ET',
+        ))
+
+    def render(self, ingredients, recipes):
+        offsets = {}
+        position = 0
+
+        def write(number, body):
+            nonlocal position
+            offsets[number] = position
+            chunk = b'%d 0 obj\n%s\nendobj\n' % (number, body)
+            position += len(chunk)
+            return chunk
+
+        header = b'%PDF-1.4\n%\xe2\xe3\xcf\xd3\n'
+        position += len(header)
+        yield header
+        yield write(1, b'<< /Type /Catalog /Pages 2 0 R >>')
+        yield write(3, (
+            b'<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica '
+            b'/Encoding 4 0 R /ToUnicode 5 0 R >>'
+        ))
+        yield write(4, (
+            b'<< /Type /Encoding /BaseEncoding /WinAnsiEncoding '
+            b'/Differences [128 %s] >>' % self.encoding_differences().encode()
+        ))
+        cmap = self.to_unicode_cmap()
+        yield write(5, b'<< /Length %d >>\nstream\n%s\nendstream' % (
+            len(cmap), cmap
+        ))
+        pages = []
+        lines = shopping_list_lines(ingredients, recipes)
+        number = 6
+        while True:
+            page_lines = list(islice(lines, PDF_LINES_PER_PAGE))
+            if not page_lines:
+                break
+            content = self.page_content(page_lines)
+            yield write(number, b'<< /Length %d >>\nstream\n%s\nendstream' % (
+                len(content), content
+            ))
+            yield write(number + 1, (
+                b'<< /Type /Page /Parent 2 0 R /MediaBox [0 0 %d %d] '
+                b'/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>'
+                % (PDF_PAGE_WIDTH, PDF_PAGE_HEIGHT, number)
+            ))
+            pages.append(number + 1)
+            number += 2
+        yield write(2, b'<< /Type /Pages /Kids [%s] /Count %d >>' % (
+            b' '.join(b'%d 0 R' % page for page in pages), len(pages)
+        ))
+        yield b''.join((
+            b'xref\n0 %d\n0000000000 65535 f \n' % number,
+            *(b'%010d 00000 n \n' % offsets[index]
+              for index in range(1, number)),
+            b'trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n'
+            % (number, position),
+        ))
+
+
+SHOPPING_LIST_RENDERERS = {
+    renderer.extension: renderer
+    for renderer in (
+        TextShoppingListRenderer(),
+        CSVShoppingListRenderer(),
+        PDFShoppingListRenderer(),
+    )
+}
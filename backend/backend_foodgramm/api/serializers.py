@@ -1,25 +1,94 @@
 import base64
+import binascii
 from collections import Counter
+from tempfile import SpooledTemporaryFile
 
-from django.core.files.base import ContentFile
+from django.conf import settings
+from django.core.files import File
 from django.core.validators import MinValueValidator
+from django.db import transaction
 from djoser.serializers import UserSerializer as DjoserUserSerializer
 from rest_framework import serializers
 
+from api.catalog import known_ingredients, known_tags
+from api.metrics import TimedSerializerMixin
 from recipes.models import (
     Favorite, Follow, Ingredient, RecipeIngredient, MIN_AMOUNT,
     MIN_COOKING_TIME, Recipe, ShoppingCart, Tag, User
 )
+from recipes.images import rendition_urls
+from recipes.shopping_cart import change_recipe
 
 
-class UserSerializer(DjoserUserSerializer):
+class ImageRenditionsField(serializers.Field):
+    def __init__(self, **kwargs):
+        kwargs['read_only'] = True
+        super().__init__(**kwargs)
+
+    def to_representation(self, image):
+        if not image:
+            return None
+        request = self.context.get('request')
+        return {
+            rendition: request.build_absolute_uri(url) if request else url
+            for rendition, url in rendition_urls(image).items()
+        }
+
+
+def parse_ids(values):
+    ids = set()
+    for value in values:
+        if isinstance(value, bool):
+            continue
+        try:
+            ids.add(int(value))
+        except (TypeError, ValueError):
+            pass
+    return ids
+
+
+class CatalogPrimaryKeyField(serializers.PrimaryKeyRelatedField):
+    # Проверяет id по заранее найденному набору из контекста вместо
+    # отдельного запроса на каждое значение.
+
+    def __init__(self, known_ids, **kwargs):
+        self.known_ids = known_ids
+        kwargs['queryset'] = known_ids.model.objects.all()
+        super().__init__(**kwargs)
+
+    def to_internal_value(self, data):
+        try:
+            if isinstance(data, bool):
+                raise TypeError
+            pk = int(data)
+        except (TypeError, ValueError):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+        existing = self.context.get('existing_ids', {}).get(self.known_ids)
+        if existing is None:
+            existing = self.known_ids.existing([pk])
+        if pk not in existing:
+            self.fail('does_not_exist', pk_value=data)
+        return self.known_ids.model.from_db(
+            self.get_queryset().db, ['id'], [pk]
+        )
+
+
+class UserSerializer(TimedSerializerMixin, DjoserUserSerializer):
     is_subscribed = serializers.SerializerMethodField()
+    avatar_renditions = ImageRenditionsField(source='avatar')
 
     class Meta:
         model = User
-        fields = (*DjoserUserSerializer.Meta.fields, 'is_subscribed', 'avatar')
+        fields = (
+            *DjoserUserSerializer.Meta.fields,
+            'is_subscribed',
+            'avatar',
+            'avatar_renditions',
+        )
 
     def get_is_subscribed(self, following):
+        if hasattr(following, 'is_subscribed'):
+            return following.is_subscribed
         request = self.context.get('request')
         return (request.user.is_authenticated
                 and Follow.objects.filter(
@@ -28,15 +97,42 @@ class UserSerializer(DjoserUserSerializer):
 
 
 class Base64imageField(serializers.ImageField):
+    default_error_messages = {
+        'too_large': 'Размер изображения не должен превышать {max_size} байт.',
+        'invalid_base64': 'Изображение должно быть закодировано в base64.',
+    }
+    chunk_size = 64 * 1024
+
     def to_internal_value(self, data):
         if isinstance(data, str) and data.startswith('data:image/'):
-            format, imgstr = data.split(';base64,')
+            format, _, imgstr = data.partition(';base64,')
             ext = format.split('/')[-1]
-            data = ContentFile(base64.b64decode(imgstr), name=f'avatar.{ext}')
+            data = File(self.decode(imgstr), name=f'avatar.{ext}')
         return super().to_internal_value(data)
 
-
-class AvatarSerializer(serializers.ModelSerializer):
+    def decode(self, imgstr):
+        if len(imgstr) * 3 // 4 > settings.MAX_IMAGE_SIZE + 2:
+            self.fail('too_large', max_size=settings.MAX_IMAGE_SIZE)
+        file = SpooledTemporaryFile(
+            max_size=settings.FILE_UPLOAD_MAX_MEMORY_SIZE
+        )
+        size = 0
+        for start in range(0, len(imgstr), self.chunk_size):
+            try:
+                chunk = base64.b64decode(
+                    imgstr[start:start + self.chunk_size], validate=True
+                )
+            except binascii.Error:
+                self.fail('invalid_base64')
+            size += len(chunk)
+            if size > settings.MAX_IMAGE_SIZE:
+                self.fail('too_large', max_size=settings.MAX_IMAGE_SIZE)
+            file.write(chunk)
+        file.seek(0)
+        return file
+
+
+class AvatarSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     avatar = Base64imageField(allow_null=True)
 
     class Meta:
@@ -44,7 +140,7 @@ class AvatarSerializer(serializers.ModelSerializer):
         fields = ('avatar',)
 
 
-class IngredientsSerializer(serializers.ModelSerializer):
+class IngredientsSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = Ingredient
         fields = '__all__'
@@ -64,9 +160,7 @@ class IngredientToRecipeReadSerializer(serializers.ModelSerializer):
 
 
 class IngredientWriteSerializer(serializers.ModelSerializer):
-    id = serializers.PrimaryKeyRelatedField(
-        queryset=Ingredient.objects.all()
-    )
+    id = CatalogPrimaryKeyField(known_ingredients)
     amount = serializers.IntegerField(
         validators=[MinValueValidator(MIN_AMOUNT)]
     )
@@ -76,13 +170,13 @@ class IngredientWriteSerializer(serializers.ModelSerializer):
         fields = ('id', 'amount')
 
 
-class TagSerializer(serializers.ModelSerializer):
+class TagSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = Tag
         fields = '__all__'
 
 
-class ResipesReadSerializer(serializers.ModelSerializer):
+class ResipesReadSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     author = UserSerializer()
     ingredients = IngredientToRecipeReadSerializer(
         many=True, read_only=True, source='recipe_ingredients'
@@ -90,6 +184,7 @@ class ResipesReadSerializer(serializers.ModelSerializer):
     tags = TagSerializer(many=True)
     is_favorited = serializers.SerializerMethodField()
     is_in_shopping_cart = serializers.SerializerMethodField()
+    image_renditions = ImageRenditionsField(source='image')
 
     class Meta:
         model = Recipe
@@ -104,10 +199,13 @@ class ResipesReadSerializer(serializers.ModelSerializer):
             'cooking_time',
             'is_favorited',
             'is_in_shopping_cart',
+            'image_renditions',
         )
 
     @staticmethod
-    def object_exists(model, request, recipe):
+    def object_exists(model, request, recipe, annotation):
+        if hasattr(recipe, annotation):
+            return getattr(recipe, annotation)
         return (
             request
             and request.user.is_authenticated
@@ -118,33 +216,45 @@ class ResipesReadSerializer(serializers.ModelSerializer):
         return self.object_exists(
             Favorite,
             self.get_context(),
-            recipe
+            recipe,
+            'is_favorited'
         )
 
     def get_is_in_shopping_cart(self, recipe):
         return self.object_exists(
             ShoppingCart,
             self.get_context(),
-            recipe
+            recipe,
+            'is_in_shopping_cart'
         )
 
     def get_context(self):
         return self.context.get('request')
 
 
-class RecipeShortReadSerializer(serializers.ModelSerializer):
+class RecipeShortReadSerializer(
+    TimedSerializerMixin, serializers.ModelSerializer
+):
+    image_renditions = ImageRenditionsField(source='image')
+
     class Meta:
         model = Recipe
-        fields = ('id', 'name', 'cooking_time', 'image')
+        fields = ('id', 'name', 'cooking_time', 'image', 'image_renditions')
 
 
-class ResipeWriteSerializer(serializers.ModelSerializer):
+class RecipeIdsSerializer(TimedSerializerMixin, serializers.Serializer):
+    recipes = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        allow_empty=False,
+        max_length=settings.BULK_RECIPES_MAX,
+    )
+
+
+class ResipeWriteSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     ingredients = IngredientWriteSerializer(
         many=True,
     )
-    tags = serializers.PrimaryKeyRelatedField(
-        queryset=Tag.objects.all(), many=True
-    )
+    tags = CatalogPrimaryKeyField(known_tags, many=True)
     image = Base64imageField()
     cooking_time = serializers.IntegerField(
         validators=[MinValueValidator(MIN_COOKING_TIME)]
@@ -161,6 +271,21 @@ class ResipeWriteSerializer(serializers.ModelSerializer):
             'image',
         )
 
+    def to_internal_value(self, data):
+        if isinstance(data, dict):
+            ingredients = data.get('ingredients')
+            tags = data.get('tags')
+            self.context['existing_ids'] = {
+                known_ingredients: known_ingredients.existing(parse_ids(
+                    ingredient.get('id') for ingredient in ingredients
+                    if isinstance(ingredient, dict)
+                ) if isinstance(ingredients, list) else ()),
+                known_tags: known_tags.existing(
+                    parse_ids(tags) if isinstance(tags, list) else ()
+                ),
+            }
+        return super().to_internal_value(data)
+
     def validate(self, data):
         self.validate_tags_ingredients(
             [ingredient['id'] for ingredient in data.get('ingredients')],
@@ -173,16 +298,52 @@ class ResipeWriteSerializer(serializers.ModelSerializer):
     def validate_tags_ingredients(objects, message):
         if not objects:
             raise serializers.ValidationError(f'{message} не указаны')
-        if len(objects) != len(set(objects)):
-            double = [
-                object.id
-                for object in objects if Counter(objects)[object] > 1
-            ]
+        double = {
+            object.id for object, count in Counter(objects).items()
+            if count > 1
+        }
+        if double:
             raise serializers.ValidationError(
-                f'{message} {set(double)} не должны повторяться'
+                f'{message} {double} не должны повторяться'
             )
 
+    @staticmethod
+    def confirm_catalog_ids(validated_data):
+        # Известные id хранятся в памяти процесса, а тег или продукт мог
+        # быть удалён в другом процессе: внутри транзакции записи id
+        # сверяются с базой, чтобы вместо ошибки внешнего ключа вернуть
+        # ошибку проверки.
+        message = CatalogPrimaryKeyField.default_error_messages[
+            'does_not_exist'
+        ]
+        tags = [tag.id for tag in validated_data['tags']]
+        ingredients = [
+            ingredient['id'].id
+            for ingredient in validated_data['ingredients']
+        ]
+        errors = {}
+        for field, known_ids, ids in (
+            ('tags', known_tags, tags),
+            ('ingredients', known_ingredients, ingredients),
+        ):
+            missing = set(ids) - set(known_ids.model.objects.filter(
+                id__in=ids
+            ).values_list('id', flat=True))
+            if missing:
+                known_ids.forget(missing)
+                errors[field] = [
+                    message.format(pk_value=pk) for pk in ids if pk in missing
+                ] if field == 'tags' else [
+                    {'id': [message.format(pk_value=pk)]}
+                    if pk in missing else {}
+                    for pk in ids
+                ]
+        if errors:
+            raise serializers.ValidationError(errors)
+
+    @transaction.atomic
     def create(self, validated_data):
+        self.confirm_catalog_ids(validated_data)
         ingredients = validated_data.pop('ingredients')
         tags = validated_data.pop('tags')
         validated_data.update({'author': self.context.get('request').user})
@@ -201,10 +362,45 @@ class ResipeWriteSerializer(serializers.ModelSerializer):
             ) for ingredient in ingredients
         )
 
+    @staticmethod
+    def update_ingredients(recipe, ingredients):
+        new_amounts = {
+            ingredient['id'].id: ingredient['amount']
+            for ingredient in ingredients
+        }
+        # Удалённые строки вычитаются из списков покупок сигналами,
+        # изменённые и новые — здесь, одним пересчётом.
+        old_amounts = Counter()
+        current, removed, changed = {}, [], []
+        for recipe_ingredient in recipe.recipe_ingredients.select_for_update():
+            ingredient_id = recipe_ingredient.ingredient_id
+            if ingredient_id not in new_amounts or ingredient_id in current:
+                removed.append(recipe_ingredient.id)
+                continue
+            old_amounts[ingredient_id] = recipe_ingredient.amount
+            current[ingredient_id] = recipe_ingredient
+            if recipe_ingredient.amount != new_amounts[ingredient_id]:
+                recipe_ingredient.amount = new_amounts[ingredient_id]
+                changed.append(recipe_ingredient)
+        if removed:
+            RecipeIngredient.objects.filter(id__in=removed).delete()
+        if changed:
+            RecipeIngredient.objects.bulk_update(changed, ['amount'])
+        RecipeIngredient.objects.bulk_create(
+            RecipeIngredient(
+                recipe=recipe, ingredient_id=ingredient_id, amount=amount
+            )
+            for ingredient_id, amount in new_amounts.items()
+            if ingredient_id not in current
+        )
+        changes = Counter(new_amounts)
+        changes.subtract(old_amounts)
+        change_recipe(recipe.id, changes)
+
+    @transaction.atomic
     def update(self, instance, validated_data):
-        instance.tags.clear()
-        instance.ingredients.clear()
-        self.create_ingredients(instance, validated_data.pop('ingredients'))
+        self.confirm_catalog_ids(validated_data)
+        self.update_ingredients(instance, validated_data.pop('ingredients'))
         instance.tags.set(validated_data.pop('tags'))
         return super().update(instance, validated_data)
 
@@ -212,12 +408,21 @@ class ResipeWriteSerializer(serializers.ModelSerializer):
         return ResipesReadSerializer(instance, context=self.context).data
 
 
+def get_recipes_limit(request):
+    recipes_limit = request.query_params.get('recipes_limit')
+    if recipes_limit is None:
+        return settings.RECIPES_LIMIT_MAX
+    try:
+        recipes_limit = int(recipes_limit)
+    except ValueError:
+        raise serializers.ValidationError(
+            {'recipes_limit': 'Значение должно быть целым числом'}
+        )
+    return max(0, min(recipes_limit, settings.RECIPES_LIMIT_MAX))
+
+
 class FollowReadSerializer(UserSerializer):
     recipes = serializers.SerializerMethodField()
-    recipes_count = serializers.IntegerField(
-        source='recipes.count',
-        read_only=True
-    )
 
     class Meta:
         model = User
@@ -225,10 +430,15 @@ class FollowReadSerializer(UserSerializer):
         read_only_fields = fields
 
     def get_recipes(self, user):
+        authors_recipes = self.context.get('authors_recipes')
+        if authors_recipes is not None:
+            recipes = authors_recipes.get(user.id, [])
+        else:
+            recipes = user.recipes.all()[
+                :get_recipes_limit(self.context.get('request'))
+            ]
         return RecipeShortReadSerializer(
-            user.recipes.all()[:int(self.context.get(
-                'request'
-            ).GET.get('recipes_limit', 10**10))],
+            recipes,
             many=True,
             read_only=True
         ).data
@@ -0,0 +1,54 @@
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+
+from api.authentication import token_cache
+from api.cache import bump_version
+from recipes.images import renditions_ready
+from recipes.models import Ingredient, Recipe, RecipeIngredient, Tag, User
+from recipes.signals import catalog_loaded
+
+CATALOG_VERSIONS = {
+    Ingredient: 'ingredients',
+    Tag: 'tags',
+}
+
+
+@receiver((post_save, post_delete, catalog_loaded), sender=Ingredient)
+@receiver((post_save, post_delete, catalog_loaded), sender=Tag)
+def bump_catalog_version(sender, **kwargs):
+    bump_version(CATALOG_VERSIONS[sender])
+    bump_version('recipes')
+
+
+@receiver((post_save, post_delete), sender=Recipe)
+@receiver((post_save, post_delete), sender=RecipeIngredient)
+@receiver(m2m_changed, sender=Recipe.tags.through)
+@receiver(renditions_ready)
+def bump_recipes_version(**kwargs):
+    bump_version('recipes')
+
+
+@receiver(post_save, sender=User)
+def bump_recipes_version_on_author_change(created, update_fields, **kwargs):
+    if created or update_fields == frozenset(('last_login',)):
+        return
+    bump_version('recipes')
+
+
+@receiver(post_delete, sender=Token)
+def forget_token(instance, **kwargs):
+    token_cache.delete(instance.key)
+
+
+@receiver(post_save, sender=User)
+def forget_user_tokens(instance, **kwargs):
+    token_cache.delete_user(instance.pk)
+
+
+@receiver(renditions_ready)
+def forget_avatar_owner_tokens(name, **kwargs):
+    for user_id in User.objects.filter(avatar=name).values_list(
+        'pk', flat=True
+    ):
+        token_cache.delete_user(user_id)
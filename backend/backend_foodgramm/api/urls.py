@@ -1,8 +1,11 @@
-from django.urls import include, path
+from django.conf import settings
+from django.urls import URLPattern, include, path
 from rest_framework.routers import DefaultRouter
 
+from recipes.asynchronous import async_view
 from .views import (
-    ResipesViewSet, TagsViewSet, IngredientsViewSet, FoodGramUserViewSet
+    ResipesViewSet, TagsViewSet, IngredientsViewSet, FoodGramUserViewSet,
+    metrics_view
 )
 
 router_api = DefaultRouter()
@@ -13,7 +16,29 @@ router_api.register(
     r'ingredients', IngredientsViewSet, basename='ingredients'
 )
 router_api.register('users', FoodGramUserViewSet, basename='users')
+
+# В режиме ASGI частые чтения обслуживаются асинхронно, запросы к базе
+# идут в пул.
+ASYNC_ROUTES = {
+    'recipes-list',
+    'tags-list',
+    'tags-detail',
+    'ingredients-list',
+    'ingredients-detail',
+}
+
 urlpatterns = [
-    path('', include(router_api.urls)),
+    path('', include([
+        URLPattern(
+            pattern.pattern,
+            async_view(pattern.callback),
+            pattern.default_args,
+            pattern.name,
+        ) if pattern.name in ASYNC_ROUTES else pattern
+        for pattern in router_api.urls
+    ])),
     path('auth/', include('djoser.urls.authtoken')),
 ]
+
+if settings.METRICS_ENABLED:
+    urlpatterns.append(path('metrics/', metrics_view, name='metrics'))
@@ -1,62 +1,139 @@
-from django.db.models import Sum
-from django.http import FileResponse
+from django.conf import settings
+from django.db.models import (
+    BooleanField, Exists, F, OuterRef, Prefetch, Value
+)
+from django.db import transaction
+from django.http import HttpResponse, StreamingHttpResponse
 from django.shortcuts import get_object_or_404
 from django_filters.rest_framework import DjangoFilterBackend
 from django.urls import reverse
 from djoser.views import UserViewSet
 from rest_framework import serializers, status, viewsets
-from rest_framework.decorators import action
-from rest_framework.filters import SearchFilter
+from rest_framework.decorators import action, api_view, permission_classes
 from rest_framework.permissions import (
-    AllowAny, IsAuthenticated, IsAuthenticatedOrReadOnly
+    AllowAny, IsAdminUser, IsAuthenticated, IsAuthenticatedOrReadOnly
 )
 from rest_framework.response import Response
 from rest_framework.serializers import ValidationError
+from rest_framework.settings import api_settings
 
+from api.cache import AnonymousCacheMixin, VersionedCacheMixin
 from api.filters import RecipeFilter
+from api.fragments import CompiledRecipeListMixin
+from api.ingredients_index import ingredients_index
+from api.metrics import registry
+from api.pagination import RecipeCursorPagination, RecipePagination
 from api.permissions import AuthorOrReadOnly
-from api.render import render_shopping_list
+from api.render import SHOPPING_LIST_RENDERERS
 from recipes.models import (
     Favorite, Follow, Ingredient, RecipeIngredient,
     Recipe, ShoppingCart, Tag, User
 )
+from recipes.counters import refresh_counters
+from recipes.shopping_cart import add_recipes
+from recipes.timeline import Feed
 from .serializers import (
     AvatarSerializer, FollowReadSerializer, IngredientsSerializer,
-    RecipeShortReadSerializer, ResipeWriteSerializer, ResipesReadSerializer,
-    TagSerializer
+    RecipeIdsSerializer, RecipeShortReadSerializer, ResipeWriteSerializer,
+    ResipesReadSerializer, TagSerializer, get_recipes_limit
 )
 
 
-class IngredientsViewSet(viewsets.ReadOnlyModelViewSet):
+def lock_user(user):
+    # Изменения списков одного пользователя выполняются по очереди.
+    User.objects.select_for_update().filter(pk=user.pk).exists()
+
+
+class IngredientsViewSet(VersionedCacheMixin, viewsets.ReadOnlyModelViewSet):
     queryset = Ingredient.objects.all()
     serializer_class = IngredientsSerializer
-    filter_backends = (SearchFilter,)
-    search_fields = ('^name',)
     pagination_class = None
+    version_name = 'ingredients'
+
+    def list(self, request, *args, **kwargs):
+        name = request.query_params.get(api_settings.SEARCH_PARAM)
+        if not name:
+            return super().list(request, *args, **kwargs)
+        return Response(ingredients_index.search(
+            name, settings.INGREDIENTS_SEARCH_LIMIT
+        ))
 
 
-class TagsViewSet(viewsets.ReadOnlyModelViewSet):
+class TagsViewSet(VersionedCacheMixin, viewsets.ReadOnlyModelViewSet):
     queryset = Tag.objects.all()
     serializer_class = TagSerializer
     pagination_class = None
+    version_name = 'tags'
 
 
-class ResipesViewSet(viewsets.ModelViewSet):
-    queryset = Recipe.objects.all()
+class ResipesViewSet(
+    AnonymousCacheMixin, CompiledRecipeListMixin, viewsets.ModelViewSet
+):
     permission_classes = [IsAuthenticatedOrReadOnly, AuthorOrReadOnly]
     filter_backends = [DjangoFilterBackend]
     filterset_class = RecipeFilter
+    pagination_class = RecipePagination
     http_method_names = ['get', 'post', 'patch', 'delete']
+    version_name = 'recipes'
+    cache_query_params = (
+        'page', 'limit', 'tags', 'author', 'pagination', 'cursor', 'search'
+    )
 
     def get_serializer_class(self):
         if self.action in ('list', 'retrieve'):
             return ResipesReadSerializer
         return ResipeWriteSerializer
 
+    def get_queryset(self):
+        if self.action in ('list', 'retrieve'):
+            return self.get_read_queryset()
+        return Recipe.objects.all()
+
+    def get_read_queryset(self):
+        user = self.request.user
+        recipes = Recipe.objects.prefetch_related(
+            Prefetch('tags', queryset=Tag.objects.all()),
+            Prefetch(
+                'recipe_ingredients',
+                queryset=RecipeIngredient.objects.select_related('ingredient')
+            ),
+        )
+        if not user.is_authenticated:
+            return recipes.select_related('author').annotate(
+                is_favorited=Value(False, output_field=BooleanField()),
+                is_in_shopping_cart=Value(False, output_field=BooleanField()),
+            )
+        return recipes.prefetch_related(
+            Prefetch('author', queryset=User.objects.annotate(
+                is_subscribed=Exists(Follow.objects.filter(
+                    user=user, following=OuterRef('pk')
+                ))
+            )),
+        ).annotate(
+            is_favorited=Exists(Favorite.objects.filter(
+                user=user, recipe=OuterRef('pk')
+            )),
+            is_in_shopping_cart=Exists(ShoppingCart.objects.filter(
+                user=user, recipe=OuterRef('pk')
+            )),
+        )
+
+    def perform_create(self, serializer):
+        serializer.instance = self.get_read_queryset().get(
+            pk=serializer.save().pk
+        )
+
+    def perform_update(self, serializer):
+        serializer.instance = self.get_read_queryset().get(
+            pk=serializer.save().pk
+        )
+
     @staticmethod
+    @transaction.atomic
     def add_or_remove_favorite_or_shopping_cart(model, recipe_id, request):
         recipe = get_object_or_404(Recipe, pk=recipe_id)
         user = request.user
+        lock_user(user)
         if request.method == 'DELETE':
             get_object_or_404(model, user=user, recipe=recipe).delete()
             return Response(status=status.HTTP_204_NO_CONTENT)
@@ -68,6 +145,49 @@ class ResipesViewSet(viewsets.ModelViewSet):
             status=status.HTTP_201_CREATED
         )
 
+    @staticmethod
+    @transaction.atomic
+    def bulk_add_or_remove_favorite_or_shopping_cart(model, request):
+        serializer = RecipeIdsSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        recipe_ids = list(dict.fromkeys(serializer.validated_data['recipes']))
+        user = request.user
+        lock_user(user)
+        existing = set(Recipe.objects.filter(
+            pk__in=recipe_ids
+        ).values_list('pk', flat=True))
+        in_list = set(model.objects.filter(
+            user=user, recipe_id__in=recipe_ids
+        ).values_list('recipe_id', flat=True))
+        if request.method == 'DELETE':
+            changed = [pk for pk in recipe_ids if pk in in_list]
+            model.objects.filter(user=user, recipe_id__in=changed).delete()
+            statuses = ('removed', 'not_in_list')
+        else:
+            changed = [
+                pk for pk in recipe_ids if pk in existing and pk not in in_list
+            ]
+            model.objects.bulk_create(
+                (model(user=user, recipe_id=pk) for pk in changed),
+                ignore_conflicts=True,
+            )
+            # ignore_conflicts молча пропускает строки, добавленные
+            # параллельно, поэтому счётчики пересчитываются по факту.
+            refresh_counters(model, changed)
+            statuses = ('added', 'already_added')
+        changed_ids = set(changed)
+        return changed, Response({'results': [
+            {
+                'id': pk,
+                'status': (
+                    'not_found' if pk not in existing
+                    else statuses[0] if pk in changed_ids
+                    else statuses[1]
+                ),
+            }
+            for pk in recipe_ids
+        ]})
+
     @action(
         detail=True,
         methods=['post', 'delete'],
@@ -94,6 +214,38 @@ class ResipesViewSet(viewsets.ModelViewSet):
             request=request,
         )
 
+    @action(
+        detail=False,
+        methods=['post', 'delete'],
+        permission_classes=(IsAuthenticated,),
+        url_path=r'favorite/bulk',
+    )
+    def favorite_bulk(self, request):
+        _, response = self.bulk_add_or_remove_favorite_or_shopping_cart(
+            model=Favorite,
+            request=request,
+        )
+        return response
+
+    @action(
+        detail=False,
+        methods=['post', 'delete'],
+        permission_classes=(IsAuthenticated,),
+        url_path=r'shopping_cart/bulk',
+    )
+    @transaction.atomic
+    def shopping_cart_bulk(self, request):
+        changed, response = (
+            self.bulk_add_or_remove_favorite_or_shopping_cart(
+                model=ShoppingCart,
+                request=request,
+            )
+        )
+        if request.method == 'POST':
+            # bulk_create не отправляет сигналы, удаление — отправляет.
+            add_recipes(request.user.id, changed)
+        return response
+
     @action(
         detail=False,
         methods=['get'],
@@ -101,17 +253,48 @@ class ResipesViewSet(viewsets.ModelViewSet):
         url_path='download_shopping_cart',
     )
     def download_shopping_cart(self, request):
-        return FileResponse(
-            render_shopping_list(
-                RecipeIngredient.objects.filter(
-                    recipe__shoppingcarts__user=request.user
-                ).values('ingredient__name', 'ingredient__measurement_unit')
-                .annotate(ingredient_amount=Sum('amount')).order_by(
-                    'ingredient__name'),
-                request.user.shoppingcarts.all()
+        renderer = SHOPPING_LIST_RENDERERS.get(
+            request.query_params.get('output', 'txt')
+        )
+        if renderer is None:
+            raise ValidationError(
+                'Доступные форматы: '
+                f'{", ".join(SHOPPING_LIST_RENDERERS)}'
+            )
+        response = StreamingHttpResponse(
+            renderer.render(
+                request.user.shopping_cart_ingredients.values(
+                    'ingredient__name',
+                    'ingredient__measurement_unit',
+                    ingredient_amount=F('amount'),
+                ).order_by('ingredient__name').iterator(),
+                request.user.shoppingcarts.values_list(
+                    'recipe__name', flat=True
+                ).iterator()
+            ),
+            content_type=renderer.content_type,
+        )
+        response['Content-Disposition'] = (
+            f'inline; filename="shopping_cart.{renderer.extension}"'
+        )
+        return response
+
+    @action(
+        detail=False,
+        methods=['get'],
+        permission_classes=(IsAuthenticated,),
+    )
+    def feed(self, request):
+        paginator = RecipeCursorPagination()
+        return self.compiled_response(
+            paginator.paginate_queryset(
+                Feed(
+                    self.filter_queryset(Recipe.objects.all()), request.user
+                ),
+                request,
+                view=self,
             ),
-            content_type='text/plain',
-            filename='shopping_cart.txt'
+            paginator,
         )
 
     @action(
@@ -147,22 +330,51 @@ class FoodGramUserViewSet(UserViewSet):
         url_path='subscriptions',
     )
     def subscriptions(self, request):
-        pages = self.paginate_queryset(
-            User.objects.filter(authors__user=self.request.user)
+        authors = self.paginate_queryset(
+            User.objects.filter(authors__user=request.user).annotate(
+                is_subscribed=Value(True, output_field=BooleanField()),
+            )
         )
         serializer = FollowReadSerializer(
-            pages,
+            authors,
             many=True,
-            context={'request': request}
+            context={
+                'request': request,
+                'authors_recipes': self.get_authors_recipes(
+                    [author.id for author in authors],
+                    get_recipes_limit(request),
+                ),
+            }
         )
         return self.get_paginated_response(serializer.data)
 
+    @staticmethod
+    def get_authors_recipes(author_ids, recipes_limit):
+        authors_recipes = {author_id: [] for author_id in author_ids}
+        if not author_ids or not recipes_limit:
+            return authors_recipes
+        for recipe in Recipe.objects.raw(
+            'SELECT id, name, cooking_time, image, image_renditions_name, '
+            'author_id FROM ('
+            'SELECT id, name, cooking_time, image, image_renditions_name, '
+            'author_id, ROW_NUMBER() '
+            'OVER (PARTITION BY author_id ORDER BY created_at DESC, id DESC) '
+            f'AS recipe_rank FROM {Recipe._meta.db_table} '
+            f'WHERE author_id IN ({", ".join(["%s"] * len(author_ids))})'
+            ') AS ranked_recipes WHERE recipe_rank <= %s '
+            'ORDER BY author_id, recipe_rank',
+            (*author_ids, recipes_limit)
+        ):
+            authors_recipes[recipe.author_id].append(recipe)
+        return authors_recipes
+
     @action(
         detail=True,
         methods=['delete', 'post'],
         permission_classes=(IsAuthenticated,),
         url_path=r'subscribe',
     )
+    @transaction.atomic
     def subscribe(self, request, id):
         following = get_object_or_404(User, id=id)
         user = request.user
@@ -200,7 +412,9 @@ class FoodGramUserViewSet(UserViewSet):
     def avatar(self, request):
         user = request.user
         if request.method == 'DELETE':
-            user.avatar.delete()
+            # Файл удаляется сигналом после фиксации транзакции.
+            user.avatar = None
+            user.save(update_fields=('avatar',))
             return Response(status=status.HTTP_204_NO_CONTENT)
         serializer = self.get_serializer(
             user, data=request.data, context={'request': request}
@@ -208,3 +422,11 @@ class FoodGramUserViewSet(UserViewSet):
         serializer.is_valid(raise_exception=True)
         serializer.save()
         return Response(serializer.data, status=status.HTTP_200_OK)
+
+
+@api_view(['GET'])
+@permission_classes((IsAdminUser,))
+def metrics_view(request):
+    return HttpResponse(
+        registry.render(), content_type='text/plain; version=0.0.4'
+    )
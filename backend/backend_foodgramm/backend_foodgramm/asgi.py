@@ -9,8 +9,13 @@ https://docs.djangoproject.com/en/4.2/howto/deployment/asgi/
 
 import os
 
-from django.core.asgi import get_asgi_application
+import django
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "backend_foodgramm.settings")
+os.environ.setdefault("ASGI_MODE", "1")
 
-application = get_asgi_application()
+django.setup(set_prefix=False)
+
+from api.asgi import ASGIHandler  # noqa: E402
+
+application = ASGIHandler()
@@ -1,4 +1,5 @@
 import os
+import tempfile
 from pathlib import Path
 
 from django.core.management.utils import get_random_secret_key
@@ -41,6 +42,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'api.metrics.RequestMetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -70,6 +72,8 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'backend_foodgramm.wsgi.application'
 
+ASGI_APPLICATION = 'backend_foodgramm.asgi.application'
+
 IS_SQLITE3 = os.getenv('IS_SQLITE3', False)
 
 if IS_SQLITE3:
@@ -91,6 +95,48 @@ else:
         }
     }
 
+CACHE_BACKENDS = {
+    'locmem': 'django.core.cache.backends.locmem.LocMemCache',
+    'file': 'django.core.cache.backends.filebased.FileBasedCache',
+}
+
+# Счётчики версий общие для всех процессов: воркеров gunicorn и команд
+# manage.py (загрузка тегов и продуктов). Поэтому default не может быть
+# locmem; файловый кеш должен лежать в каталоге, общем для процессов.
+CACHES = {
+    'default': {
+        'BACKEND': CACHE_BACKENDS[os.getenv('CACHE_BACKEND', 'file')],
+        'LOCATION': os.getenv(
+            'CACHE_LOCATION',
+            os.path.join(tempfile.gettempdir(), 'foodgram-cache'),
+        ),
+        'TIMEOUT': None,
+    },
+    # Готовые ответы; ключ содержит общую версию, а срок жизни
+    # ограничивает устаревание после изменений без сигналов
+    # (bulk_create, update).
+    'responses': {
+        'BACKEND': CACHE_BACKENDS[
+            os.getenv('RESPONSE_CACHE_BACKEND', 'locmem')
+        ],
+        'LOCATION': os.getenv('RESPONSE_CACHE_LOCATION', 'foodgram-responses'),
+        'TIMEOUT': int(os.getenv('RESPONSE_CACHE_TTL', 300)),
+        'OPTIONS': {'MAX_ENTRIES': 1000},
+    },
+    # JSON отдельных рецептов; ключ содержит версию рецепта и общие
+    # версии тегов и продуктов, поэтому устаревшие записи не читаются и
+    # вытесняются по MAX_ENTRIES. Срок жизни страхует от изменений без
+    # сигналов.
+    'fragments': {
+        'BACKEND': CACHE_BACKENDS[
+            os.getenv('FRAGMENT_CACHE_BACKEND', 'locmem')
+        ],
+        'LOCATION': os.getenv('FRAGMENT_CACHE_LOCATION', 'foodgram-fragments'),
+        'TIMEOUT': int(os.getenv('FRAGMENT_CACHE_TTL', 3600)),
+        'OPTIONS': {'MAX_ENTRIES': 10000},
+    },
+}
+
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
 
@@ -137,6 +183,17 @@ STATIC_ROOT = BASE_DIR / 'collected_static'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = '/media'
 
+MAX_IMAGE_SIZE = 5 * 1024 * 1024
+
+IMAGE_RENDITION_WORKERS = int(os.getenv('IMAGE_RENDITION_WORKERS', 2))
+
+# Включается backend_foodgramm.asgi: частые чтения обслуживаются
+# асинхронными представлениями.
+ASGI_MODE = os.getenv('ASGI_MODE', False)
+
+# Потоки для запросов к базе из асинхронных представлений (режим ASGI).
+ASGI_THREADS = int(os.getenv('ASGI_THREADS', 8))
+
 IMPORTING_FILES_DIR = os.path.join(BASE_DIR, 'data')
 
 # Default primary key field type
@@ -148,8 +205,12 @@ REST_FRAMEWORK = {
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.AllowAny',
     ],
+    'DEFAULT_RENDERER_CLASSES': [
+        'api.metrics.TimedJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework.authentication.TokenAuthentication',
+        'api.authentication.CachedTokenAuthentication',
     ],
     'DEFAULT_FILTER_BACKENDS': [
         'django_filters.rest_framework.DjangoFilterBackend',
@@ -174,3 +235,28 @@ DJOSER = {
 }
 
 PAGE_SIZE = 6
+
+INGREDIENTS_SEARCH_LIMIT = 50
+
+RECIPES_LIMIT_MAX = 50
+
+BULK_RECIPES_MAX = 100
+
+CATALOG_KNOWN_IDS_MAX = 100000
+
+# Заголовок Server-Timing и гистограммы по маршрутам на /api/metrics/
+# (только для персонала, по токену). Гистограммы хранятся в памяти
+# каждого процесса отдельно.
+METRICS_ENABLED = os.getenv('METRICS_ENABLED', False)
+
+RECIPE_SEARCH_CONFIG = os.getenv('RECIPE_SEARCH_CONFIG', 'russian')
+
+FEED_FANOUT_MAX_SUBSCRIBERS = 1000
+
+FEED_FANOUT_BATCH_SIZE = 500
+
+TOKEN_CACHE_SIZE = 10000
+
+# Кеш токенов локален для процесса: выход из аккаунта в другом воркере
+# вступает в силу не позже чем через TOKEN_CACHE_TTL секунд.
+TOKEN_CACHE_TTL = 60
@@ -2,8 +2,10 @@ from django.contrib import admin
 from django.contrib.admin import display
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
 from django.contrib.auth.models import Group
+from django.db.models import Count, Prefetch
 from django.utils.safestring import mark_safe
 
+from .images import rendition_urls
 from .models import (Favorite, Ingredient, Recipe, RecipeIngredient,
                      ShoppingCart, Tag, User)
 
@@ -86,22 +88,10 @@ class UserAdmin(BaseUserAdmin):
         if not user.avatar:
             return 'Нет аватара'
         return mark_safe(
-            f'<img src="{user.avatar.url}" '
+            f'<img src="{rendition_urls(user.avatar)["thumb"]}" '
             f'style="max-width: 75px; max-height: 55px;" />'
         )
 
-    @admin.display(description='Рецепты')
-    def recipes_count(self, user):
-        return user.recipes.count()
-
-    @admin.display(description='Подписки')
-    def subscriptions_count(self, user):
-        return user.follows.count()
-
-    @admin.display(description='Подписчики')
-    def subscribers_count(self, user):
-        return user.authors.count()
-
 
 class RecipeIngredientAdmin(admin.StackedInline):
     model = RecipeIngredient
@@ -116,7 +106,7 @@ class RecipeAdmin(admin.ModelAdmin):
         'cooking_time',
         'get_author',
         'get_tags',
-        'in_favorites',
+        'favorites_count',
         'get_ingredients',
         'get_image'
     )
@@ -124,14 +114,21 @@ class RecipeAdmin(admin.ModelAdmin):
     search_fields = ('name', 'get_author', 'tags',)
     inlines = (RecipeIngredientAdmin,)
 
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related(
+            'author'
+        ).prefetch_related(
+            'tags',
+            Prefetch(
+                'recipe_ingredients',
+                queryset=RecipeIngredient.objects.select_related('ingredient')
+            ),
+        )
+
     @display(description='Автор')
     def get_author(self, recipe):
         return recipe.author.username
 
-    @display(description='В избранном')
-    def in_favorites(self, recipe):
-        return recipe.favorites.count()
-
     @display(description='Продукты')
     def get_ingredients(self, recipe):
         return mark_safe('<br>'.join(
@@ -142,7 +139,10 @@ class RecipeAdmin(admin.ModelAdmin):
 
     @display(description='Изображение')
     def get_image(self, recipe):
-        return mark_safe(f'<img src={recipe.image.url} width="75" height="55"')
+        return mark_safe(
+            f'<img src={rendition_urls(recipe.image)["thumb"]} '
+            'width="75" height="55"'
+        )
 
     @display(description='Теги')
     def get_tags(self, recipe):
@@ -151,13 +151,18 @@ class RecipeAdmin(admin.ModelAdmin):
 
 
 class CountBaseAdmin:
-    @display(description='Использований')
+    def get_queryset(self, request):
+        return super().get_queryset(request).annotate(
+            recipes_total=Count('recipes')
+        )
+
+    @display(description='Использований', ordering='recipes_total')
     def in_recipes(self, obj):
-        return obj.recipes.count()
+        return obj.recipes_total
 
 
 @admin.register(Ingredient)
-class IngredientMixinAdmin(admin.ModelAdmin, CountBaseAdmin):
+class IngredientMixinAdmin(CountBaseAdmin, admin.ModelAdmin):
     list_display = (
         'pk', 'name', 'measurement_unit', 'in_recipes'
     )
@@ -166,7 +171,7 @@ class IngredientMixinAdmin(admin.ModelAdmin, CountBaseAdmin):
 
 
 @admin.register(Tag)
-class TagMixinAdmin(admin.ModelAdmin, CountBaseAdmin):
+class TagMixinAdmin(CountBaseAdmin, admin.ModelAdmin):
     list_display = ('id', 'name', 'slug', 'in_recipes')
     search_fields = ('name', 'slug')
 
@@ -174,9 +179,11 @@ class TagMixinAdmin(admin.ModelAdmin, CountBaseAdmin):
 @admin.register(Favorite, ShoppingCart)
 class FavoriteShoppingCartAdmin(admin.ModelAdmin):
     list_display = ('id', 'user', 'recipe')
+    list_select_related = ('user', 'recipe')
     search_fields = ('user', 'recipe')
 
 
 @admin.register(RecipeIngredient)
 class RecipeIngredientAdmin(admin.ModelAdmin):
     list_display = ('id', 'recipe', 'ingredient', 'amount')
+    list_select_related = ('recipe', 'ingredient')
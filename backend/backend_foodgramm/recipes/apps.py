@@ -1,7 +1,14 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_migrate
 
 
 class RecipesConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "recipes"
     verbose_name = "Рецепты"
+
+    def ready(self):
+        from recipes import signals  # noqa: F401
+        from recipes.search import restore_search_after_migrate
+
+        post_migrate.connect(restore_search_after_migrate, sender=self)
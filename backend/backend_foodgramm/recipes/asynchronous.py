@@ -0,0 +1,59 @@
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack
+from contextvars import ContextVar
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections, connection
+
+executor = ThreadPoolExecutor(
+    max_workers=settings.ASGI_THREADS,
+    thread_name_prefix='asgi',
+)
+# Устанавливается обработчиком ASGI; под WSGI асинхронные представления
+# выполняются через async_to_sync и возвращаются в поток запроса.
+pooled = ContextVar('pooled', default=False)
+# Обёртки SQL-запросов текущего запроса (метрики): у потоков пула своё
+# соединение, поэтому обёртки устанавливаются на него заново.
+execute_wrappers = ContextVar('execute_wrappers', default=())
+
+
+def run_sync(function):
+    if not pooled.get():
+        return sync_to_async(function, thread_sensitive=True)
+
+    # Одна задача пула на запрос; соединение с базой закрывается так же,
+    # как сигналами request_started/request_finished.
+    @wraps(function)
+    def call(*args, **kwargs):
+        close_old_connections()
+        try:
+            with ExitStack() as stack:
+                for wrapper in execute_wrappers.get():
+                    stack.enter_context(connection.execute_wrapper(wrapper))
+                return function(*args, **kwargs)
+        finally:
+            close_old_connections()
+    return sync_to_async(call, thread_sensitive=False, executor=executor)
+
+
+def render_view(view, request, *args, **kwargs):
+    response = view(request, *args, **kwargs)
+    if callable(getattr(response, 'render', None)):
+        response.render()
+    return response
+
+
+def async_view(view):
+    # Только для режима ASGI: под WSGI переход в цикл событий и обратно
+    # лишь замедляет запрос. DRF 3.12 не поддерживает асинхронные
+    # представления, поэтому обработка целиком, вместе с рендерингом,
+    # уходит в пул одной задачей.
+    if not settings.ASGI_MODE:
+        return view
+
+    @wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        return await run_sync(render_view)(view, request, *args, **kwargs)
+    return wrapper
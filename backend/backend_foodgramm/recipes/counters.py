@@ -0,0 +1,64 @@
+from collections import Counter, defaultdict
+
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce, Greatest
+
+from recipes.models import Favorite, Follow, Recipe, User
+
+COUNTERS = (
+    (Favorite, 'recipe', Recipe, 'favorites_count'),
+    (Follow, 'user', User, 'subscriptions_count'),
+    (Follow, 'following', User, 'subscribers_count'),
+    (Recipe, 'author', User, 'recipes_count'),
+)
+
+
+def change_counters(instance, delta):
+    bulk_change_counters(type(instance), [instance], delta)
+
+
+def bulk_change_counters(model, instances, delta):
+    for source, field, counted_model, counter in COUNTERS:
+        if source is not model:
+            continue
+        changes = defaultdict(list)
+        for pk, count in Counter(
+            getattr(instance, f'{field}_id') for instance in instances
+        ).items():
+            changes[count * delta].append(pk)
+        for change, pks in changes.items():
+            # Расхождение счётчика не должно приводить к нарушению
+            # ограничения неотрицательности.
+            counted_model.objects.filter(pk__in=pks).update(
+                **{counter: Greatest(F(counter) + change, 0)}
+            )
+
+
+def actual_count(source, field):
+    return Coalesce(
+        Subquery(
+            source.objects.filter(**{field: OuterRef('pk')}).order_by()
+            .values(field).annotate(total=Count('pk')).values('total')
+        ),
+        0,
+    )
+
+
+def refresh_counters(source, pks):
+    for counted_source, field, model, counter in COUNTERS:
+        if counted_source is source:
+            model.objects.filter(pk__in=pks).update(
+                **{counter: actual_count(source, field)}
+            )
+
+
+def recount_counters():
+    repaired = {}
+    for source, field, model, counter in COUNTERS:
+        drifted = model.objects.annotate(
+            actual=actual_count(source, field)
+        ).exclude(**{counter: F('actual')})
+        repaired[counter] = model.objects.filter(
+            pk__in=drifted.values('pk')
+        ).update(**{counter: actual_count(source, field)})
+    return repaired
@@ -0,0 +1,97 @@
+import logging
+import os
+from io import BytesIO
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import close_old_connections, transaction
+from django.dispatch import Signal
+from PIL import Image, ImageOps
+
+RENDITIONS = {
+    'thumb': 150,
+    'card': 600,
+    'full': 1600,
+}
+RENDITION_QUALITY = 85
+
+renditions_ready = Signal()
+logger = logging.getLogger(__name__)
+executor = ThreadPoolExecutor(
+    max_workers=settings.IMAGE_RENDITION_WORKERS,
+    thread_name_prefix='image-renditions',
+)
+
+
+def rendition_name(name, rendition):
+    return f'{os.path.splitext(name)[0]}_{rendition}.jpg'
+
+
+def renditions_name_field(field_name):
+    return f'{field_name}_renditions_name'
+
+
+def has_renditions(image):
+    # Модель хранит имя файла, для которого готовы размеры: при замене
+    # изображения признак перестаёт совпадать без отдельного сброса.
+    return getattr(
+        image.instance, renditions_name_field(image.field.name), None
+    ) == image.name
+
+
+def rendition_urls(image, ready=None):
+    if not (has_renditions(image) if ready is None else ready):
+        return dict.fromkeys(RENDITIONS, image.url)
+    return {
+        rendition: image.storage.url(rendition_name(image.name, rendition))
+        for rendition in RENDITIONS
+    }
+
+
+def delete_image(name, storage=default_storage):
+    for path in (name, *(
+        rendition_name(name, rendition) for rendition in RENDITIONS
+    )):
+        storage.delete(path)
+
+
+def generate_renditions(name, storage=default_storage):
+    try:
+        with storage.open(name) as file, Image.open(file) as original:
+            original = ImageOps.exif_transpose(original).convert('RGB')
+            for rendition, size in sorted(
+                RENDITIONS.items(), key=lambda item: -item[1]
+            ):
+                image = original.copy()
+                image.thumbnail((size, size))
+                buffer = BytesIO()
+                image.save(
+                    buffer, 'JPEG', quality=RENDITION_QUALITY, optimize=True
+                )
+                path = rendition_name(name, rendition)
+                storage.delete(path)
+                storage.save(path, ContentFile(buffer.getvalue()))
+        renditions_ready.send(sender=None, name=name)
+    except Exception:
+        logger.exception('Не удалось подготовить размеры изображения %s', name)
+
+
+def generate_in_background(name, storage):
+    # Получатели renditions_ready пишут в базу из потока пула: соединение
+    # потока закрывается, как после обычного запроса.
+    close_old_connections()
+    try:
+        generate_renditions(name, storage)
+    finally:
+        close_old_connections()
+
+
+def schedule_renditions(image):
+    if not image or has_renditions(image):
+        return
+    name, storage = image.name, image.storage
+    transaction.on_commit(
+        lambda: executor.submit(generate_in_background, name, storage)
+    )
@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+
+from recipes.counters import recount_counters
+
+
+class Command(BaseCommand):
+
+    def handle(self, *args, **options):
+        for counter, repaired in recount_counters().items():
+            print(f'{counter}: исправлено записей {repaired}')
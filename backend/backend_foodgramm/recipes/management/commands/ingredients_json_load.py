@@ -1,8 +1,5 @@
-from recipes.management.load_base import LoadBase
-from recipes.models import Ingredient
+from recipes.management.load_base import IngredientsLoad
 
 
-class Command(LoadBase):
+class Command(IngredientsLoad):
     file_name = 'ingredients.json'
-    model = Ingredient
-    name = 'продукты'
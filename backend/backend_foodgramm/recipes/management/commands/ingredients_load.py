@@ -1,27 +1,5 @@
-import os
-from csv import DictReader
+from recipes.management.load_base import IngredientsLoad
 
-from django.conf import settings
-from django.core.management.base import BaseCommand
 
-from recipes.models import Ingredient
-
-
-class Command(BaseCommand):
-
-    def handle(self, *args, **options):
-        with open(
-                os.path.join(settings.BASE_DIR, 'data/ingredients.csv'),
-                'r',
-                encoding='utf-8'
-        ) as file:
-            ingredients = [
-                Ingredient(
-                    **row
-                )
-                for row in DictReader(
-                    file, fieldnames=('name', 'measurement_unit',)
-                )
-            ]
-            Ingredient.objects.bulk_create(ingredients, ignore_conflicts=True)
-            print('Продукты загружены')
+class Command(IngredientsLoad):
+    file_name = 'ingredients.csv'
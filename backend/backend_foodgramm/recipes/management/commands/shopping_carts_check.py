@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from recipes.shopping_cart import find_inconsistencies
+
+
+class Command(BaseCommand):
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--user', type=int, action='append', dest='users',
+            help='id пользователя (можно указать несколько раз)',
+        )
+
+    def handle(self, *args, **options):
+        inconsistencies = find_inconsistencies(options['users'])
+        for user_id, ingredient_id, expected, stored in inconsistencies:
+            print(
+                f'Пользователь {user_id}, продукт {ingredient_id}: '
+                f'ожидается {expected}, сохранено {stored}'
+            )
+        if inconsistencies:
+            raise CommandError(
+                f'Найдено расхождений: {len(inconsistencies)}. '
+                'Выполните shopping_carts_rebuild.'
+            )
+        print('Списки покупок согласованы')
@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from recipes.shopping_cart import rebuild_totals
+
+
+class Command(BaseCommand):
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--user', type=int, action='append', dest='users',
+            help='id пользователя (можно указать несколько раз)',
+        )
+
+    def handle(self, *args, **options):
+        print(
+            'Списки покупок пересчитаны. '
+            f'Записей: {rebuild_totals(options["users"])}'
+        )
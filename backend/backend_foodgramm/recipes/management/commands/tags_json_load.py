@@ -1,8 +1,5 @@
-from recipes.management.load_base import LoadBase
-from recipes.models import Tag
+from recipes.management.load_base import TagsLoad
 
 
-class Command(LoadBase):
+class Command(TagsLoad):
     file_name = 'tags.json'
-    model = Tag
-    name = 'теги'
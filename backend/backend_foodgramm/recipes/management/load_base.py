@@ -1,20 +1,253 @@
+import csv
+import io
 import json
 import os
+import re
+from itertools import islice
+from time import perf_counter
 
 from django.conf import settings
-from django.core.management import BaseCommand
+from django.core.management import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from recipes.models import Ingredient, Tag
+from recipes.signals import catalog_loaded
+
+FORMATS = {
+    '.csv': 'csv',
+    '.json': 'json',
+    '.ndjson': 'ndjson',
+    '.jsonl': 'ndjson',
+}
+WHITESPACE = re.compile(r'[\s,]*')
+CHUNK_SIZE = 1 << 16
+
+
+def read_csv(file, fields):
+    return csv.DictReader(file, fieldnames=fields)
+
+
+def read_json(file, fields):
+    # Массив читается по частям: в памяти только текущий фрагмент файла.
+    decoder = json.JSONDecoder()
+    buffer = file.read(CHUNK_SIZE).lstrip()
+    if not buffer:
+        return
+    if not buffer.startswith('['):
+        raise CommandError('Ожидался JSON-массив объектов')
+    position = 1
+    while True:
+        position = WHITESPACE.match(buffer, position).end()
+        if buffer.startswith(']', position):
+            return
+        try:
+            row, position = decoder.raw_decode(buffer, position)
+        except json.JSONDecodeError:
+            chunk = file.read(CHUNK_SIZE)
+            if not chunk:
+                raise CommandError('Некорректный или оборванный JSON')
+            buffer = buffer[position:] + chunk
+            position = 0
+            continue
+        yield row
+
+
+def read_ndjson(file, fields):
+    for line in file:
+        if line.strip():
+            yield json.loads(line)
+
+
+READERS = {
+    'csv': read_csv,
+    'json': read_json,
+    'ndjson': read_ndjson,
+}
 
 
 class LoadBase(BaseCommand):
+    fields = ()
+    unique_fields = ()
+    update_fields = ()
+    constraint = None
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--file',
+            default=os.path.join(
+                settings.IMPORTING_FILES_DIR, self.file_name
+            ),
+        )
+        parser.add_argument('--format', choices=READERS)
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--dry-run', action='store_true')
+
+    def clean(self, row):
+        try:
+            row = {field: str(row[field]).strip() for field in self.fields}
+        except (KeyError, TypeError):
+            return None
+        return row if all(row.values()) else None
+
+    def get_key(self, row):
+        return tuple(row[field] for field in self.unique_fields)
 
-    def handle(self, *args, **kwargs):
-        file_path = os.path.join(settings.IMPORTING_FILES_DIR, self.file_name)
-        with open(file_path, mode='r', encoding='utf-8') as file:
-            new_objects = self.model.objects.bulk_create(
-                (self.model(**row) for row in json.load(file)),
-                ignore_conflicts=True,
+    def merge_orm(self, rows, dry_run):
+        first = self.unique_fields[0]
+        existing = {
+            self.get_key(vars(instance)): instance
+            for instance in self.model.objects.filter(**{
+                f'{first}__in': {row[first] for row in rows.values()}
+            })
+        }
+        existing = {
+            key: instance for key, instance in existing.items()
+            if key in rows
+        }
+        new = [
+            self.model(**row) for key, row in rows.items()
+            if key not in existing
+        ]
+        changed = []
+        for key, instance in existing.items():
+            row = rows[key]
+            if any(
+                getattr(instance, field) != row[field]
+                for field in self.update_fields
+            ):
+                for field in self.update_fields:
+                    setattr(instance, field, row[field])
+                changed.append(instance)
+        if not dry_run:
+            self.model.objects.bulk_create(new, ignore_conflicts=True)
+            if changed:
+                self.model.objects.bulk_update(changed, self.update_fields)
+        return len(new), len(changed)
+
+    def merge_postgresql(self, rows, staging):
+        quote = connection.ops.quote_name
+        table = quote(self.model._meta.db_table)
+        columns = ', '.join(quote(field) for field in self.fields)
+        key = ', '.join(quote(field) for field in self.unique_fields)
+        target = (
+            f'ON CONSTRAINT {quote(self.constraint)}' if self.constraint
+            else f'({key})'
+        )
+        if self.update_fields:
+            action = 'DO UPDATE SET {} WHERE {}'.format(
+                ', '.join(
+                    f'{quote(field)} = EXCLUDED.{quote(field)}'
+                    for field in self.update_fields
+                ),
+                ' OR '.join(
+                    f'{table}.{quote(field)} IS DISTINCT FROM '
+                    f'EXCLUDED.{quote(field)}'
+                    for field in self.update_fields
+                ),
+            )
+        else:
+            action = 'DO NOTHING'
+        data = io.StringIO()
+        csv.writer(data).writerows(
+            [row[field] for field in self.fields] for row in rows.values()
+        )
+        data.seek(0)
+        with connection.cursor() as cursor:
+            cursor.execute(f'TRUNCATE {staging}')
+            cursor.copy_expert(
+                f'COPY {staging} ({columns}) FROM STDIN WITH (FORMAT csv)',
+                data,
+            )
+            cursor.execute(
+                f'WITH merged AS ('
+                f'INSERT INTO {table} ({columns}) '
+                f'SELECT {columns} FROM {staging} '
+                f'ON CONFLICT {target} {action} '
+                f'RETURNING xmax = 0 AS created) '
+                f'SELECT count(*) FILTER (WHERE created), '
+                f'count(*) FILTER (WHERE NOT created) FROM merged'
+            )
+            return cursor.fetchone()
+
+    def create_staging(self):
+        quote = connection.ops.quote_name
+        staging = quote(f'{self.model._meta.db_table}_staging')
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'CREATE TEMP TABLE IF NOT EXISTS {staging} AS '
+                'SELECT {} FROM {} WITH NO DATA'.format(
+                    ', '.join(quote(field) for field in self.fields),
+                    quote(self.model._meta.db_table),
+                )
             )
+        return staging
+
+    def handle(self, *args, **options):
+        file_path = options['file']
+        file_format = options['format'] or FORMATS.get(
+            os.path.splitext(file_path)[1].lower()
+        )
+        if file_format is None:
+            raise CommandError(
+                f'Не удалось определить формат файла {file_path}'
+            )
+        dry_run = options['dry_run']
+        staging = None
+        if not dry_run and connection.vendor == 'postgresql':
+            staging = self.create_staging()
+        total = invalid = created = updated = 0
+        start = perf_counter()
+        with open(file_path, mode='r', encoding='utf-8', newline='') as file:
+            rows = READERS[file_format](file, self.fields)
+            while True:
+                batch = list(islice(rows, options['batch_size']))
+                if not batch:
+                    break
+                total += len(batch)
+                unique = {}
+                for row in map(self.clean, batch):
+                    if row is None:
+                        invalid += 1
+                    else:
+                        unique[self.get_key(row)] = row
+                if unique:
+                    with transaction.atomic():
+                        if staging:
+                            batch_created, batch_updated = (
+                                self.merge_postgresql(unique, staging)
+                            )
+                        else:
+                            batch_created, batch_updated = self.merge_orm(
+                                unique, dry_run
+                            )
+                    created += batch_created
+                    updated += batch_updated
+                elapsed = perf_counter() - start
+                self.stderr.write(
+                    f'Обработано {total} строк, {total / elapsed:.0f} строк/с'
+                )
+        if not dry_run:
+            catalog_loaded.send(sender=self.model)
+        elapsed = perf_counter() - start
         print(
-            f'Успешно загружены {self.name} из {file_path}. '
-            f'Количеcтво новых: {len(new_objects)}'
+            f'{"Проверены" if dry_run else "Успешно загружены"} '
+            f'{self.name} из {file_path} за {elapsed:.1f} с. '
+            f'Строк: {total}, некорректных: {invalid}, '
+            f'новых: {created}, обновлённых: {updated}'
         )
+
+
+class IngredientsLoad(LoadBase):
+    model = Ingredient
+    name = 'продукты'
+    fields = ('name', 'measurement_unit')
+    unique_fields = ('name', 'measurement_unit')
+    constraint = 'unique_name_and_measurement_unit'
+
+
+class TagsLoad(LoadBase):
+    model = Tag
+    name = 'теги'
+    fields = ('name', 'slug')
+    unique_fields = ('slug',)
+    update_fields = ('name',)
@@ -0,0 +1,57 @@
+# Generated by Django 3.2 on 2026-10-17 06:56
+
+from django.db import migrations, models
+from django.db.models.functions import Coalesce
+
+COUNTERS = (
+    ('Favorite', 'recipe', 'Recipe', 'favorites_count'),
+    ('Follow', 'user', 'User', 'subscriptions_count'),
+    ('Follow', 'following', 'User', 'subscribers_count'),
+    ('Recipe', 'author', 'User', 'recipes_count'),
+)
+
+
+def fill_counters(apps, schema_editor):
+    for source, field, model, counter in COUNTERS:
+        source = apps.get_model('recipes', source)
+        apps.get_model('recipes', model).objects.update(**{
+            counter: Coalesce(
+                models.Subquery(
+                    source.objects.filter(**{field: models.OuterRef('pk')})
+                    .order_by().values(field)
+                    .annotate(total=models.Count('pk')).values('total')
+                ),
+                0,
+            )
+        })
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0004_shopping_cart_ingredient'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='favorites_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='В избранном'),
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='recipes_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Рецепты'),
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='subscribers_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Подписчики'),
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='subscriptions_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Подписки'),
+        ),
+        migrations.RunPython(fill_counters, migrations.RunPython.noop),
+    ]
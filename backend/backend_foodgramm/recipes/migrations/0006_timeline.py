@@ -0,0 +1,50 @@
+# Generated by Django 3.2 on 2026-10-17 07:03
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def fill_timelines(apps, schema_editor):
+    TimelineEntry = apps.get_model('recipes', 'TimelineEntry')
+    TimelineEntry.objects.bulk_create(
+        (
+            TimelineEntry(user_id=user_id, recipe_id=recipe_id)
+            for user_id, recipe_id in apps.get_model('recipes', 'Follow')
+            .objects.filter(
+                following__subscribers_count__lte=(
+                    settings.FEED_FANOUT_MAX_SUBSCRIBERS
+                ),
+                following__recipes__isnull=False,
+            ).values_list('user_id', 'following__recipes__id').iterator()
+        ),
+        batch_size=settings.FEED_FANOUT_BATCH_SIZE,
+        ignore_conflicts=True,
+    )
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0005_counters'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TimelineEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('recipe', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='timeline_entries', to='recipes.recipe', verbose_name='Рецепт')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='timeline', to=settings.AUTH_USER_MODEL, verbose_name='Подписчик')),
+            ],
+            options={
+                'verbose_name': 'Запись ленты',
+                'verbose_name_plural': 'Записи лент',
+                'ordering': ('recipe',),
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='timelineentry',
+            constraint=models.UniqueConstraint(fields=('user', 'recipe'), name='unique_user_timeline_recipe'),
+        ),
+        migrations.RunPython(fill_timelines, migrations.RunPython.noop),
+    ]
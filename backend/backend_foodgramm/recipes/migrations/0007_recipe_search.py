@@ -0,0 +1,53 @@
+from django.conf import settings
+from django.db import migrations
+
+from recipes.search import drop_sqlite_search, install_sqlite_search
+
+POSTGRESQL_FORWARD = (
+    """
+    ALTER TABLE recipes_recipe ADD COLUMN search_vector tsvector
+    GENERATED ALWAYS AS (
+        setweight(to_tsvector(%(config)s::regconfig, coalesce(name, '')), 'A')
+        || setweight(to_tsvector(%(config)s::regconfig, coalesce(text, '')), 'B')
+    ) STORED
+    """,
+    """
+    CREATE INDEX recipe_search_vector_idx ON recipes_recipe
+    USING GIN (search_vector)
+    """,
+)
+POSTGRESQL_BACKWARD = (
+    'DROP INDEX IF EXISTS recipe_search_vector_idx',
+    'ALTER TABLE recipes_recipe DROP COLUMN IF EXISTS search_vector',
+)
+
+
+def execute(schema_editor, statements):
+    params = {'config': settings.RECIPE_SEARCH_CONFIG}
+    for statement in statements:
+        schema_editor.execute(statement, params)
+
+
+def create_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        execute(schema_editor, POSTGRESQL_FORWARD)
+    elif schema_editor.connection.vendor == 'sqlite':
+        install_sqlite_search(schema_editor.connection)
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        execute(schema_editor, POSTGRESQL_BACKWARD)
+    elif schema_editor.connection.vendor == 'sqlite':
+        drop_sqlite_search(schema_editor.connection)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0006_timeline'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
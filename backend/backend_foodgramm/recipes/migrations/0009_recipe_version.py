@@ -0,0 +1,21 @@
+# Generated by Django 3.2 on 2026-10-17 07:21
+
+from django.db import migrations, models
+
+from recipes.search import restore_sqlite_search
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0008_recipe_tags_tag_recipe_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='version',
+            field=models.PositiveIntegerField(default=1, editable=False, verbose_name='Версия'),
+        ),
+        migrations.RunPython(restore_sqlite_search, restore_sqlite_search),
+    ]
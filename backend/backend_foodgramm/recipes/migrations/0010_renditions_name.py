@@ -0,0 +1,53 @@
+# Generated by Django 3.2 on 2026-10-17 07:51
+
+import os
+
+from django.core.files.storage import default_storage
+from django.db import migrations, models
+
+from recipes.search import restore_sqlite_search
+
+IMAGE_FIELDS = (
+    ('Recipe', 'image'),
+    ('User', 'avatar'),
+)
+
+
+def fill_renditions_names(apps, schema_editor):
+    # Размеры, подготовленные до появления поля, находятся по миниатюре.
+    for model_name, field in IMAGE_FIELDS:
+        model = apps.get_model('recipes', model_name)
+        ready = [
+            name for name in model.objects.exclude(
+                **{f'{field}__isnull': True}
+            ).exclude(**{field: ''}).values_list(field, flat=True).distinct()
+            if default_storage.exists(
+                f'{os.path.splitext(name)[0]}_thumb.jpg'
+            )
+        ]
+        for name in ready:
+            model.objects.filter(**{field: name}).update(
+                **{f'{field}_renditions_name': name}
+            )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0009_recipe_version'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='image_renditions_name',
+            field=models.CharField(blank=True, editable=False, max_length=100, verbose_name='Размеры изображения готовы для'),
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='avatar_renditions_name',
+            field=models.CharField(blank=True, editable=False, max_length=100, verbose_name='Размеры аватара готовы для'),
+        ),
+        migrations.RunPython(restore_sqlite_search, restore_sqlite_search),
+        migrations.RunPython(fill_renditions_names, migrations.RunPython.noop),
+    ]
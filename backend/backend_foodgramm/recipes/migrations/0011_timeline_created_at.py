@@ -0,0 +1,39 @@
+# Generated by Django 3.2 on 2026-10-17 09:12
+
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+import django.utils.timezone
+
+
+def fill_created_at(apps, schema_editor):
+    TimelineEntry = apps.get_model('recipes', 'TimelineEntry')
+    TimelineEntry.objects.update(created_at=Subquery(
+        apps.get_model('recipes', 'Recipe').objects.filter(
+            pk=OuterRef('recipe_id')
+        ).values('created_at')[:1]
+    ))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0010_renditions_name'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='timelineentry',
+            name='created_at',
+            field=models.DateTimeField(default=django.utils.timezone.now, verbose_name='Время создания рецепта'),
+            preserve_default=False,
+        ),
+        migrations.RunPython(fill_created_at, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='timelineentry',
+            index=models.Index(fields=['user', '-created_at', '-recipe'], name='timeline_user_created_at_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='recipe',
+            index=models.Index(fields=['author', '-created_at', '-id'], name='recipe_author_created_at_idx'),
+        ),
+    ]
@@ -31,9 +31,31 @@ def validate_username(username):
     return username
 
 
-class User(AbstractUser):
+class ManagedFieldsMixin:
+    # Счётчики и признаки готовности меняются только запросами UPDATE;
+    # обычное сохранение их не записывает, иначе вернулось бы значение
+    # из памяти.
+    managed_fields = ()
+
+    def save(self, *args, update_fields=None, **kwargs):
+        if update_fields is None and not self._state.adding:
+            update_fields = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key
+                and field.name not in self.managed_fields
+            ]
+        super().save(*args, update_fields=update_fields, **kwargs)
+
+
+class User(ManagedFieldsMixin, AbstractUser):
     USERNAME_FIELD = 'email'
     REQUIRED_FIELDS = ('first_name', 'last_name', 'username')
+    managed_fields = (
+        'recipes_count',
+        'subscriptions_count',
+        'subscribers_count',
+        'avatar_renditions_name',
+    )
     username = models.CharField(
         'Логин',
         unique=True,
@@ -51,6 +73,21 @@ class User(AbstractUser):
         blank=True,
         null=True,
     )
+    avatar_renditions_name = models.CharField(
+        'Размеры аватара готовы для',
+        max_length=100,
+        blank=True,
+        editable=False,
+    )
+    recipes_count = models.PositiveIntegerField(
+        'Рецепты', default=0, editable=False
+    )
+    subscriptions_count = models.PositiveIntegerField(
+        'Подписки', default=0, editable=False
+    )
+    subscribers_count = models.PositiveIntegerField(
+        'Подписчики', default=0, editable=False
+    )
 
     class Meta:
         verbose_name = 'Пользователь'
@@ -103,7 +140,8 @@ class Ingredient(models.Model):
         return f'{self.name} {self.measurement_unit}'
 
 
-class Recipe(models.Model):
+class Recipe(ManagedFieldsMixin, models.Model):
+    managed_fields = ('favorites_count', 'version', 'image_renditions_name')
     author = models.ForeignKey(
         User,
         on_delete=models.CASCADE,
@@ -119,6 +157,12 @@ class Recipe(models.Model):
         verbose_name='Изображение',
         blank=True,
     )
+    image_renditions_name = models.CharField(
+        verbose_name='Размеры изображения готовы для',
+        max_length=100,
+        blank=True,
+        editable=False,
+    )
     text = models.TextField(
         max_length=MAX_LENGTH_TEXT, verbose_name='Описание'
     )
@@ -141,11 +185,27 @@ class Recipe(models.Model):
         auto_now_add=True,
         verbose_name='Время создания рецепта'
     )
+    favorites_count = models.PositiveIntegerField(
+        verbose_name='В избранном', default=0, editable=False
+    )
+    version = models.PositiveIntegerField(
+        verbose_name='Версия', default=1, editable=False
+    )
 
     class Meta:
         verbose_name = 'Рецепт'
         verbose_name_plural = 'Рецепты'
-        ordering = ('-created_at',)
+        ordering = ('-created_at', '-id')
+        indexes = (
+            models.Index(
+                fields=('-created_at', '-id'),
+                name='recipe_created_at_id_idx',
+            ),
+            models.Index(
+                fields=('author', '-created_at', '-id'),
+                name='recipe_author_created_at_idx',
+            ),
+        )
 
     def __str__(self):
         return self.name
@@ -229,3 +289,67 @@ class ShoppingCart(BaseModelUserRecipe):
     class Meta(BaseModelUserRecipe.Meta):
         verbose_name = 'Список покупок'
         verbose_name_plural = 'Списки покупок'
+
+
+class ShoppingCartIngredient(models.Model):
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        verbose_name='Пользователь',
+        related_name='shopping_cart_ingredients',
+    )
+    ingredient = models.ForeignKey(
+        Ingredient,
+        on_delete=models.CASCADE,
+        verbose_name='Продукт',
+        related_name='shopping_cart_ingredients',
+    )
+    amount = models.PositiveIntegerField(verbose_name='Мера')
+
+    class Meta:
+        verbose_name = 'Продукт в списке покупок'
+        verbose_name_plural = 'Продукты в списках покупок'
+        ordering = ('ingredient',)
+        constraints = (
+            UniqueConstraint(
+                fields=('user', 'ingredient'),
+                name='unique_user_ingredient',
+            ),
+        )
+
+
+class TimelineEntry(models.Model):
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        verbose_name='Подписчик',
+        related_name='timeline',
+    )
+    recipe = models.ForeignKey(
+        Recipe,
+        on_delete=models.CASCADE,
+        verbose_name='Рецепт',
+        related_name='timeline_entries',
+    )
+    # Копия Recipe.created_at: страница ленты читается по индексу
+    # записей без обращения к таблице рецептов.
+    created_at = models.DateTimeField(
+        verbose_name='Время создания рецепта'
+    )
+
+    class Meta:
+        verbose_name = 'Запись ленты'
+        verbose_name_plural = 'Записи лент'
+        ordering = ('recipe',)
+        constraints = (
+            UniqueConstraint(
+                fields=('user', 'recipe'),
+                name='unique_user_timeline_recipe',
+            ),
+        )
+        indexes = (
+            models.Index(
+                fields=('user', '-created_at', '-recipe'),
+                name='timeline_user_created_at_idx',
+            ),
+        )
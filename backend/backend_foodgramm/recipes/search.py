@@ -0,0 +1,147 @@
+import re
+
+from django.conf import settings
+from django.db import connections
+from django.db.migrations.recorder import MigrationRecorder
+from django.db.models import BooleanField, FloatField, Q, Value
+from django.db.models.expressions import RawSQL
+
+WORD_REGEX = re.compile(r'\w+')
+
+SQLITE_TABLE = """
+    CREATE VIRTUAL TABLE IF NOT EXISTS recipes_recipe_fts USING fts5(
+        name, text, content='recipes_recipe', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+"""
+SQLITE_TRIGGERS = {
+    'recipes_recipe_fts_insert': """
+        CREATE TRIGGER IF NOT EXISTS recipes_recipe_fts_insert
+        AFTER INSERT ON recipes_recipe
+        BEGIN
+            INSERT INTO recipes_recipe_fts(rowid, name, text)
+            VALUES (new.id, new.name, new.text);
+        END
+    """,
+    'recipes_recipe_fts_delete': """
+        CREATE TRIGGER IF NOT EXISTS recipes_recipe_fts_delete
+        AFTER DELETE ON recipes_recipe
+        BEGIN
+            INSERT INTO recipes_recipe_fts(
+                recipes_recipe_fts, rowid, name, text
+            )
+            VALUES ('delete', old.id, old.name, old.text);
+        END
+    """,
+    'recipes_recipe_fts_update': """
+        CREATE TRIGGER IF NOT EXISTS recipes_recipe_fts_update
+        AFTER UPDATE OF name, text ON recipes_recipe
+        BEGIN
+            INSERT INTO recipes_recipe_fts(
+                recipes_recipe_fts, rowid, name, text
+            )
+            VALUES ('delete', old.id, old.name, old.text);
+            INSERT INTO recipes_recipe_fts(rowid, name, text)
+            VALUES (new.id, new.name, new.text);
+        END
+    """,
+}
+
+
+def install_sqlite_search(connection):
+    # SQLite пересоздаёт таблицу при изменении её полей и теряет
+    # триггеры; недостающие создаются заново, а индекс перестраивается.
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'trigger' "
+            "AND tbl_name = 'recipes_recipe'"
+        )
+        if set(SQLITE_TRIGGERS) <= {name for name, in cursor.fetchall()}:
+            return
+        cursor.execute(SQLITE_TABLE)
+        for statement in SQLITE_TRIGGERS.values():
+            cursor.execute(statement)
+        cursor.execute(
+            "INSERT INTO recipes_recipe_fts(recipes_recipe_fts) "
+            "VALUES ('rebuild')"
+        )
+
+
+def restore_sqlite_search(apps, schema_editor):
+    if schema_editor.connection.vendor == 'sqlite':
+        install_sqlite_search(schema_editor.connection)
+
+
+def restore_search_after_migrate(using, **kwargs):
+    # Страховка для будущих миграций, пересоздающих таблицу рецептов.
+    connection = connections[using]
+    if connection.vendor == 'sqlite' and (
+        ('recipes', '0007_recipe_search')
+        in MigrationRecorder(connection).applied_migrations()
+    ):
+        install_sqlite_search(connection)
+
+
+def drop_sqlite_search(connection):
+    with connection.cursor() as cursor:
+        for name in SQLITE_TRIGGERS:
+            cursor.execute(f'DROP TRIGGER IF EXISTS {name}')
+        cursor.execute('DROP TABLE IF EXISTS recipes_recipe_fts')
+
+
+def search_postgresql(recipes, query):
+    params = (settings.RECIPE_SEARCH_CONFIG, query)
+    return recipes.filter(RawSQL(
+        'recipes_recipe.search_vector @@ '
+        'websearch_to_tsquery(%s::regconfig, %s)',
+        params,
+        output_field=BooleanField(),
+    )).annotate(search_rank=RawSQL(
+        'ts_rank_cd(recipes_recipe.search_vector, '
+        'websearch_to_tsquery(%s::regconfig, %s))',
+        params,
+        output_field=FloatField(),
+    ))
+
+
+def search_sqlite(recipes, query):
+    # Пользовательский ввод не должен попасть в синтаксис FTS5:
+    # каждое слово ищется как отдельный префикс.
+    words = WORD_REGEX.findall(query)
+    if not words:
+        return recipes.none()
+    match = ' '.join(f'"{word}"*' for word in words)
+    return recipes.filter(id__in=RawSQL(
+        'SELECT rowid FROM recipes_recipe_fts '
+        'WHERE recipes_recipe_fts MATCH %s',
+        (match,),
+    )).annotate(search_rank=RawSQL(
+        'SELECT -bm25(recipes_recipe_fts, 10.0, 1.0) '
+        'FROM recipes_recipe_fts WHERE recipes_recipe_fts MATCH %s '
+        'AND recipes_recipe_fts.rowid = recipes_recipe.id',
+        (match,),
+        output_field=FloatField(),
+    ))
+
+
+def search_fallback(recipes, query):
+    recipes = recipes.annotate(
+        search_rank=Value(0.0, output_field=FloatField())
+    )
+    for word in WORD_REGEX.findall(query):
+        recipes = recipes.filter(
+            Q(name__icontains=word) | Q(text__icontains=word)
+        )
+    return recipes
+
+
+SEARCH_BACKENDS = {
+    'postgresql': search_postgresql,
+    'sqlite': search_sqlite,
+}
+
+
+def search_recipes(recipes, query):
+    return SEARCH_BACKENDS.get(
+        connections[recipes.db].vendor, search_fallback
+    )(recipes, query).order_by('-search_rank', '-created_at', '-id')
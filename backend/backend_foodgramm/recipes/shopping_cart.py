@@ -0,0 +1,128 @@
+from collections import Counter
+
+from django.db import transaction
+from django.db.models import Sum
+
+from recipes.models import (
+    RecipeIngredient, ShoppingCart, ShoppingCartIngredient
+)
+
+
+def recipes_amounts(recipe_ids):
+    return Counter(dict(
+        RecipeIngredient.objects.filter(recipe_id__in=recipe_ids)
+        .values_list('ingredient_id').annotate(Sum('amount')).order_by()
+    ))
+
+
+def calculate_totals(user_ids=None):
+    carts = ShoppingCart.objects.all()
+    if user_ids is not None:
+        carts = carts.filter(user_id__in=user_ids)
+    return {
+        (user_id, ingredient_id): amount
+        for user_id, ingredient_id, amount in carts.values_list(
+            'user_id', 'recipe__recipe_ingredients__ingredient_id'
+        ).annotate(
+            Sum('recipe__recipe_ingredients__amount')
+        ).order_by()
+        if ingredient_id is not None
+    }
+
+
+def stored_totals(user_ids=None):
+    totals = ShoppingCartIngredient.objects.all()
+    if user_ids is not None:
+        totals = totals.filter(user_id__in=user_ids)
+    return {
+        (user_id, ingredient_id): amount
+        for user_id, ingredient_id, amount in totals.values_list(
+            'user_id', 'ingredient_id', 'amount'
+        )
+    }
+
+
+@transaction.atomic
+def apply_changes(user_ids, changes):
+    changes = {
+        ingredient_id: amount
+        for ingredient_id, amount in changes.items() if amount
+    }
+    if not user_ids or not changes:
+        return
+    totals = {
+        (total.user_id, total.ingredient_id): total
+        for total in ShoppingCartIngredient.objects.select_for_update().filter(
+            user_id__in=user_ids, ingredient_id__in=changes
+        )
+    }
+    new_totals, changed_totals, empty_totals = [], [], []
+    for user_id in user_ids:
+        for ingredient_id, amount in changes.items():
+            total = totals.get((user_id, ingredient_id))
+            if total is None:
+                if amount > 0:
+                    new_totals.append(ShoppingCartIngredient(
+                        user_id=user_id,
+                        ingredient_id=ingredient_id,
+                        amount=amount,
+                    ))
+                continue
+            total.amount += amount
+            if total.amount > 0:
+                changed_totals.append(total)
+            else:
+                empty_totals.append(total.pk)
+    ShoppingCartIngredient.objects.bulk_create(new_totals)
+    ShoppingCartIngredient.objects.bulk_update(changed_totals, ('amount',))
+    ShoppingCartIngredient.objects.filter(pk__in=empty_totals).delete()
+
+
+def add_recipes(user_id, recipe_ids):
+    apply_changes([user_id], recipes_amounts(recipe_ids))
+
+
+def remove_recipes(user_id, recipe_ids):
+    apply_changes([user_id], {
+        ingredient_id: -amount
+        for ingredient_id, amount in recipes_amounts(recipe_ids).items()
+    })
+
+
+def change_recipe(recipe_id, changes):
+    if not any(changes.values()):
+        return
+    apply_changes(
+        list(ShoppingCart.objects.filter(
+            recipe_id=recipe_id
+        ).values_list('user_id', flat=True)),
+        changes,
+    )
+
+
+@transaction.atomic
+def rebuild_totals(user_ids=None):
+    totals = ShoppingCartIngredient.objects.all()
+    if user_ids is not None:
+        totals = totals.filter(user_id__in=user_ids)
+    totals.delete()
+    return len(ShoppingCartIngredient.objects.bulk_create(
+        (
+            ShoppingCartIngredient(
+                user_id=user_id, ingredient_id=ingredient_id, amount=amount
+            )
+            for (user_id, ingredient_id), amount
+            in calculate_totals(user_ids).items()
+        ),
+        batch_size=1000,
+    ))
+
+
+def find_inconsistencies(user_ids=None):
+    expected = calculate_totals(user_ids)
+    stored = stored_totals(user_ids)
+    return [
+        (*key, expected.get(key), stored.get(key))
+        for key in sorted(expected.keys() | stored.keys())
+        if expected.get(key) != stored.get(key)
+    ]
@@ -0,0 +1,202 @@
+from collections import Counter
+
+from django.db import transaction
+from django.db.models import F, Q
+from django.db.models.signals import (
+    m2m_changed, post_delete, post_save, pre_save
+)
+from django.dispatch import Signal, receiver
+
+from recipes.counters import change_counters
+from recipes.images import (
+    delete_image, renditions_ready, schedule_renditions
+)
+from recipes.models import (
+    Favorite, Follow, Recipe, RecipeIngredient, ShoppingCart, User
+)
+from recipes.shopping_cart import add_recipes, change_recipe, remove_recipes
+from recipes.timeline import backfill, fan_out, forget, restore_fan_out
+
+catalog_loaded = Signal()
+
+
+@receiver(post_save, sender=Favorite)
+@receiver(post_save, sender=Follow)
+@receiver(post_save, sender=Recipe)
+def increment_counters(sender, instance, created, **kwargs):
+    if created:
+        change_counters(instance, 1)
+
+
+@receiver(post_delete, sender=Favorite)
+@receiver(post_delete, sender=Follow)
+@receiver(post_delete, sender=Recipe)
+def decrement_counters(sender, instance, **kwargs):
+    change_counters(instance, -1)
+
+
+@receiver(pre_save, sender=ShoppingCart)
+@receiver(pre_save, sender=RecipeIngredient)
+def remember_previous_state(sender, instance, **kwargs):
+    instance.previous_state = (
+        sender.objects.filter(pk=instance.pk).first()
+        if instance.pk else None
+    )
+
+
+# Итоги списка покупок считаются по строкам, оставшимся в базе: при
+# каскадном удалении рецепта его строки списков и продуктов удаляются в
+# любом порядке, и каждая сумма вычитается ровно один раз.
+@receiver(post_save, sender=ShoppingCart)
+def add_to_shopping_cart_totals(instance, **kwargs):
+    previous = instance.previous_state
+    if previous is not None:
+        if (previous.user_id, previous.recipe_id) == (
+            instance.user_id, instance.recipe_id
+        ):
+            return
+        remove_recipes(previous.user_id, [previous.recipe_id])
+    add_recipes(instance.user_id, [instance.recipe_id])
+
+
+@receiver(post_delete, sender=ShoppingCart)
+def remove_from_shopping_cart_totals(instance, **kwargs):
+    remove_recipes(instance.user_id, [instance.recipe_id])
+
+
+@receiver(post_save, sender=RecipeIngredient)
+def change_shopping_cart_totals(instance, **kwargs):
+    previous = instance.previous_state
+    changes = Counter({instance.ingredient_id: instance.amount})
+    if previous is not None:
+        if previous.recipe_id != instance.recipe_id:
+            change_recipe(
+                previous.recipe_id,
+                {previous.ingredient_id: -previous.amount},
+            )
+        else:
+            changes.subtract({previous.ingredient_id: previous.amount})
+    change_recipe(instance.recipe_id, changes)
+
+
+@receiver(post_delete, sender=RecipeIngredient)
+def subtract_shopping_cart_totals(instance, **kwargs):
+    change_recipe(
+        instance.recipe_id, {instance.ingredient_id: -instance.amount}
+    )
+
+
+IMAGE_FIELDS = {
+    Recipe: 'image',
+    User: 'avatar',
+}
+
+
+@receiver(post_save, sender=Recipe)
+@receiver(post_save, sender=User)
+def prepare_image_renditions(sender, instance, update_fields, **kwargs):
+    field = IMAGE_FIELDS[sender]
+    if update_fields is None or field in update_fields:
+        schedule_renditions(getattr(instance, field))
+
+
+def delete_unused_image(name):
+    # Файлы удаляются после фиксации транзакции и только если имя больше
+    # не используется: при откате старое изображение остаётся нужным.
+    def delete():
+        if not any(
+            model.objects.filter(**{field: name}).exists()
+            for model, field in IMAGE_FIELDS.items()
+        ):
+            delete_image(name)
+    transaction.on_commit(delete)
+
+
+@receiver(pre_save, sender=Recipe)
+@receiver(pre_save, sender=User)
+def remember_previous_image(sender, instance, update_fields, **kwargs):
+    field = IMAGE_FIELDS[sender]
+    instance.previous_image = (
+        sender.objects.filter(pk=instance.pk).values_list(
+            field, flat=True
+        ).first()
+        if not instance._state.adding and (
+            update_fields is None or field in update_fields
+        ) else None
+    )
+
+
+@receiver(post_save, sender=Recipe)
+@receiver(post_save, sender=User)
+def delete_replaced_image(sender, instance, **kwargs):
+    previous = instance.previous_image
+    if previous and previous != getattr(instance, IMAGE_FIELDS[sender]).name:
+        delete_unused_image(previous)
+
+
+@receiver(post_delete, sender=Recipe)
+@receiver(post_delete, sender=User)
+def delete_removed_image(sender, instance, **kwargs):
+    image = getattr(instance, IMAGE_FIELDS[sender])
+    if image:
+        delete_unused_image(image.name)
+
+
+@receiver(post_save, sender=Recipe)
+def fan_out_recipe(instance, created, **kwargs):
+    if created:
+        fan_out(instance)
+
+
+@receiver(post_save, sender=Follow)
+def backfill_timeline(instance, created, **kwargs):
+    if created:
+        backfill(instance.user_id, instance.following_id)
+
+
+@receiver(post_delete, sender=Follow)
+def forget_timeline(instance, **kwargs):
+    forget(instance.user_id, instance.following_id)
+    restore_fan_out(instance.following_id)
+
+
+def bump_recipe_versions(*args, **filters):
+    # Версия входит в ключ кеша готового JSON рецепта.
+    Recipe.objects.filter(*args, **filters).update(version=F('version') + 1)
+
+
+@receiver(post_save, sender=Recipe)
+def bump_recipe_version(instance, created, **kwargs):
+    if not created:
+        bump_recipe_versions(pk=instance.pk)
+
+
+@receiver((post_save, post_delete), sender=RecipeIngredient)
+def bump_recipe_version_on_ingredients(instance, **kwargs):
+    bump_recipe_versions(pk=instance.recipe_id)
+
+
+@receiver(m2m_changed, sender=Recipe.tags.through)
+def bump_recipe_version_on_tags(instance, action, reverse, pk_set, **kwargs):
+    if action not in ('post_add', 'post_remove', 'pre_clear'):
+        return
+    if not reverse:
+        bump_recipe_versions(pk=instance.pk)
+    elif action == 'pre_clear':
+        bump_recipe_versions(tags=instance)
+    else:
+        bump_recipe_versions(pk__in=pk_set)
+
+
+@receiver(post_save, sender=User)
+def bump_author_recipe_versions(instance, created, update_fields, **kwargs):
+    if created or update_fields == frozenset(('last_login',)):
+        return
+    bump_recipe_versions(author=instance)
+
+
+@receiver(renditions_ready)
+def mark_renditions_ready(name, **kwargs):
+    Recipe.objects.filter(image=name).update(image_renditions_name=name)
+    User.objects.filter(avatar=name).update(avatar_renditions_name=name)
+    bump_recipe_versions(Q(image=name) | Q(author__avatar=name))
@@ -0,0 +1,162 @@
+from itertools import islice
+
+from django.conf import settings
+from django.db import transaction
+
+from recipes.models import Follow, Recipe, TimelineEntry, User
+
+FOLLOWED_RECIPE_FIELDS = (
+    'user_id', 'following__recipes__id', 'following__recipes__created_at'
+)
+
+
+def is_prolific(author_id):
+    # Рецепты авторов с большим числом подписчиков не раскладываются
+    # по лентам, а подмешиваются при чтении.
+    return User.objects.filter(
+        pk=author_id,
+        subscribers_count__gt=settings.FEED_FANOUT_MAX_SUBSCRIBERS,
+    ).exists()
+
+
+def fan_out(recipe):
+    if is_prolific(recipe.author_id):
+        return
+    TimelineEntry.objects.bulk_create(
+        (
+            TimelineEntry(
+                user_id=user_id,
+                recipe_id=recipe.id,
+                created_at=recipe.created_at,
+            )
+            for user_id in Follow.objects.filter(
+                following_id=recipe.author_id
+            ).values_list('user_id', flat=True).iterator()
+        ),
+        batch_size=settings.FEED_FANOUT_BATCH_SIZE,
+        ignore_conflicts=True,
+    )
+
+
+def backfill(user_id, author_id):
+    if is_prolific(author_id):
+        return
+    TimelineEntry.objects.bulk_create(
+        (
+            TimelineEntry(
+                user_id=user_id, recipe_id=recipe_id, created_at=created_at
+            )
+            for recipe_id, created_at in Recipe.objects.filter(
+                author_id=author_id
+            ).values_list('id', 'created_at').iterator()
+        ),
+        batch_size=settings.FEED_FANOUT_BATCH_SIZE,
+        ignore_conflicts=True,
+    )
+
+
+def restore_fan_out(author_id):
+    # Автор только что перестал быть популярным: его рецепты больше не
+    # подмешиваются при чтении, поэтому раскладываются по лентам всех
+    # оставшихся подписчиков, включая созданные без раскладки.
+    if not User.objects.filter(
+        pk=author_id,
+        subscribers_count=settings.FEED_FANOUT_MAX_SUBSCRIBERS,
+    ).exists():
+        return
+    create_entries(
+        TimelineEntry(
+            user_id=user_id, recipe_id=recipe_id, created_at=created_at
+        )
+        for user_id, recipe_id, created_at in Follow.objects.filter(
+            following_id=author_id,
+            following__recipes__isnull=False,
+        ).values_list(*FOLLOWED_RECIPE_FIELDS).iterator()
+    )
+
+
+def create_entries(entries):
+    entries = iter(entries)
+    while True:
+        batch = list(islice(entries, settings.FEED_FANOUT_BATCH_SIZE))
+        if not batch:
+            return
+        TimelineEntry.objects.bulk_create(batch, ignore_conflicts=True)
+
+
+def forget(user_id, author_id):
+    TimelineEntry.objects.filter(
+        user_id=user_id, recipe__author_id=author_id
+    ).delete()
+
+
+@transaction.atomic
+def rebuild():
+    TimelineEntry.objects.all().delete()
+    create_entries(
+        TimelineEntry(
+            user_id=user_id, recipe_id=recipe_id, created_at=created_at
+        )
+        for user_id, recipe_id, created_at in Follow.objects.filter(
+            following__subscribers_count__lte=(
+                settings.FEED_FANOUT_MAX_SUBSCRIBERS
+            ),
+            following__recipes__isnull=False,
+        ).values_list(*FOLLOWED_RECIPE_FIELDS).iterator()
+    )
+
+
+class Feed:
+    # Лента для курсорной пагинации: страница читается из записей
+    # подписчика по индексу (user, -created_at, -recipe), а рецепты
+    # популярных авторов подмешиваются запросами по индексу автора, каждый
+    # не длиннее страницы. Поддерживается только то, что делает
+    # пагинатор: сортировка, граница по created_at и срез.
+    def __init__(self, recipes, user, descending=True, bounds=None):
+        self.recipes = recipes
+        self.user = user
+        self.descending = descending
+        self.bounds = bounds or {}
+
+    def order_by(self, *ordering):
+        return Feed(
+            self.recipes, self.user, ordering[0].startswith('-'), self.bounds
+        )
+
+    def filter(self, **bounds):
+        return Feed(
+            self.recipes, self.user, self.descending,
+            {**self.bounds, **bounds},
+        )
+
+    def keys(self, limit):
+        sign = '-' if self.descending else ''
+        entries = TimelineEntry.objects.filter(user=self.user, **self.bounds)
+        if self.recipes.query.has_filters():
+            entries = entries.filter(recipe__in=self.recipes.values('pk'))
+        keys = set(entries.order_by(
+            f'{sign}created_at', f'{sign}recipe_id'
+        ).values_list('created_at', 'recipe_id')[:limit])
+        for author_id in Follow.objects.filter(
+            user=self.user,
+            following__subscribers_count__gt=(
+                settings.FEED_FANOUT_MAX_SUBSCRIBERS
+            ),
+        ).values_list('following_id', flat=True):
+            keys.update(self.recipes.filter(
+                author_id=author_id, **self.bounds
+            ).order_by(
+                f'{sign}created_at', f'{sign}id'
+            ).values_list('created_at', 'id')[:limit])
+        return sorted(keys, reverse=self.descending)
+
+    def __getitem__(self, page):
+        ids = [
+            recipe_id for _, recipe_id in self.keys(page.stop)[page]
+        ]
+        rows = {
+            row['id']: row for row in Recipe.objects.filter(
+                id__in=ids
+            ).order_by().values('id', 'created_at', 'version')
+        }
+        return [rows[recipe_id] for recipe_id in ids]
@@ -1,7 +1,10 @@
 from django.urls import path
 
+from recipes.asynchronous import async_view
 from recipes.views import redirect_to_recipe
 
 urlpatterns = [
-    path('<int:recipe_id>', redirect_to_recipe, name='recipe_short'),
+    path(
+        '<int:recipe_id>', async_view(redirect_to_recipe), name='recipe_short'
+    ),
 ]
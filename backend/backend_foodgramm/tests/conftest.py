@@ -0,0 +1,100 @@
+import base64
+from io import BytesIO
+
+import pytest
+from django.core.cache import caches
+from PIL import Image
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from api.authentication import token_cache
+from recipes.models import Ingredient, Recipe, RecipeIngredient, Tag, User
+
+
+def image_data():
+    buffer = BytesIO()
+    Image.new('RGB', (40, 30), 'red').save(buffer, 'PNG')
+    return 'data:image/png;base64,' + base64.b64encode(
+        buffer.getvalue()
+    ).decode()
+
+
+@pytest.fixture(autouse=True)
+def clear_caches():
+    yield
+    for cache in caches.all():
+        cache.clear()
+    token_cache.clear()
+
+
+@pytest.fixture
+def users(db):
+    return [
+        User.objects.create_user(
+            username=f'user{number}',
+            email=f'user{number}@example.com',
+            password='password',
+            first_name='Имя',
+            last_name='Фамилия',
+        )
+        for number in range(3)
+    ]
+
+
+@pytest.fixture
+def tags(db):
+    return [
+        Tag.objects.create(name=name, slug=slug)
+        for name, slug in (
+            ('Завтрак', 'breakfast'), ('Обед', 'lunch'), ('Ужин', 'dinner')
+        )
+    ]
+
+
+@pytest.fixture
+def ingredients(db):
+    return [
+        Ingredient.objects.create(name=name, measurement_unit=unit)
+        for name, unit in (
+            ('Абрикос', 'г'), ('Молоко', 'мл'), ('Соль', 'г'), ('Сахар', 'г')
+        )
+    ]
+
+
+def create_recipes(author, tags, ingredients, count, name='Рецепт'):
+    recipes = []
+    for number in range(count):
+        recipe = Recipe.objects.create(
+            author=author,
+            name=f'{name} {number}',
+            text='Описание',
+            cooking_time=10 + number,
+            image='recipes/images/recipe.png',
+        )
+        recipe.tags.set(tags[:1 + number % len(tags)])
+        for offset in range(2):
+            RecipeIngredient.objects.create(
+                recipe=recipe,
+                ingredient=ingredients[(number + offset) % len(ingredients)],
+                amount=5 + number,
+            )
+        recipes.append(recipe)
+    return recipes
+
+
+@pytest.fixture
+def recipes(users, tags, ingredients):
+    return [
+        *create_recipes(users[0], tags, ingredients, 4),
+        *create_recipes(users[1], tags, ingredients, 4, name='Блюдо'),
+    ]
+
+
+@pytest.fixture
+def client_for(db):
+    def get_client(user):
+        token, _ = Token.objects.get_or_create(user=user)
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+        return client
+    return get_client
@@ -0,0 +1,23 @@
+import tempfile
+
+from backend_foodgramm.settings import *  # noqa: F401,F403
+
+DATABASES = {
+    'default': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': ':memory:',
+    }
+}
+
+MEDIA_ROOT = tempfile.mkdtemp(prefix='foodgram-media-')
+
+CACHES = {
+    **CACHES,  # noqa: F405
+    'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': tempfile.mkdtemp(prefix='foodgram-cache-'),
+        'TIMEOUT': None,
+    },
+}
+
+PASSWORD_HASHERS = ['django.contrib.auth.hashers.MD5PasswordHasher']
@@ -0,0 +1,40 @@
+import pytest
+from django.contrib import admin
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from recipes.models import Favorite, Ingredient, Recipe, Tag, User
+
+
+@pytest.fixture
+def admin_client(client, users, recipes):
+    for recipe in recipes:
+        Favorite.objects.create(user=users[2], recipe=recipe)
+    client.force_login(User.objects.create_superuser(
+        username='admin',
+        email='admin@example.com',
+        password='password',
+        first_name='Админ',
+        last_name='Админ',
+    ))
+    return client
+
+
+@pytest.mark.parametrize('model', (Recipe, User, Ingredient, Tag))
+def test_changelist_queries_do_not_depend_on_page_size(
+    admin_client, monkeypatch, model
+):
+    url = f'/admin/recipes/{model._meta.model_name}/'
+    counts = []
+    for page_size in (1, 50):
+        monkeypatch.setattr(
+            admin.site._registry[model], 'list_per_page', page_size
+        )
+        with CaptureQueriesContext(connection) as context:
+            response = admin_client.get(url)
+        assert response.status_code == 200
+        assert len(response.context['cl'].result_list) == min(
+            page_size, model.objects.count()
+        )
+        counts.append(len(context))
+    assert counts[0] == counts[1]
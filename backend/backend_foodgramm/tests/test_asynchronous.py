@@ -0,0 +1,25 @@
+import asyncio
+
+from asgiref.sync import async_to_sync
+from django.urls import resolve
+
+from api.metrics import RequestMetrics
+from recipes.asynchronous import execute_wrappers, pooled, run_sync
+from recipes.models import Tag
+
+
+def test_views_stay_synchronous_outside_asgi():
+    for url in ('/api/recipes/', '/api/tags/', '/s/1'):
+        assert not asyncio.iscoroutinefunction(resolve(url).func)
+
+
+def test_pooled_queries_are_recorded(transactional_db):
+    metrics = RequestMetrics()
+    pooled_token = pooled.set(True)
+    wrappers_token = execute_wrappers.set((metrics.record_query,))
+    try:
+        assert async_to_sync(run_sync(Tag.objects.count))() == 0
+    finally:
+        execute_wrappers.reset(wrappers_token)
+        pooled.reset(pooled_token)
+    assert metrics.queries == 1
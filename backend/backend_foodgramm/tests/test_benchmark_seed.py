@@ -0,0 +1,20 @@
+from django.core.management import call_command
+from rest_framework.test import APIClient
+
+from api.management.commands import benchmark_seed
+
+
+def test_seed_invalidates_cached_recipes(db, monkeypatch):
+    call_command('tags_load')
+    call_command('ingredients_load')
+    client = APIClient()
+    assert client.get('/api/recipes/').json()['count'] == 0
+    # Каталог уже загружен: сбросить кеш может только сама команда.
+    monkeypatch.setattr(
+        benchmark_seed, 'call_command', lambda *args, **kwargs: None
+    )
+    call_command(
+        'benchmark_seed', users=3, recipes=5, ingredients_per_recipe=1,
+        follows=1, favorites=1, carts=1,
+    )
+    assert client.get('/api/recipes/').json()['count'] == 5
@@ -0,0 +1,67 @@
+import pytest
+from django.apps import apps
+from django.conf import settings
+from django.core.cache.backends.filebased import FileBasedCache
+from django.core.exceptions import ImproperlyConfigured
+from rest_framework.test import APIClient
+
+from api.cache import VERSION_KEY, bump_version, response_cache
+from recipes.models import Recipe
+
+
+def test_locmem_version_store_is_refused(settings):
+    settings.CACHES = {
+        **settings.CACHES,
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        },
+    }
+    with pytest.raises(ImproperlyConfigured):
+        apps.get_app_config('api').ready()
+
+
+def test_version_bumped_by_another_process(tags, settings):
+    client = APIClient()
+    etag = client.get('/api/tags/')['ETag']
+    assert client.get(
+        '/api/tags/', HTTP_IF_NONE_MATCH=etag
+    ).status_code == 304
+    # Команда manage.py видит тот же кеш через свой экземпляр бэкенда.
+    other = FileBasedCache(settings.CACHES['default']['LOCATION'], {})
+    key = VERSION_KEY.format(name='tags')
+    other.set(key, other.get(key) + 1, timeout=None)
+    assert client.get(
+        '/api/tags/', HTTP_IF_NONE_MATCH=etag
+    ).status_code == 200
+
+
+def test_changes_within_one_second_change_etag(tags):
+    client = APIClient()
+    response = client.get('/api/tags/')
+    assert not response.has_header('Last-Modified')
+    for _ in range(2):
+        bump_version('tags')
+        etag, response = response['ETag'], client.get(
+            '/api/tags/', HTTP_IF_NONE_MATCH=response['ETag']
+        )
+        assert response.status_code == 200
+        assert response['ETag'] != etag
+
+
+def test_recipes_version_bumped_by_another_process(recipes, settings):
+    client = APIClient()
+    url = f'/api/recipes/{recipes[0].pk}/'
+    assert client.get(url).json()['name'] == recipes[0].name
+    # Изменение без сигналов: кеш о нём не знает.
+    Recipe.objects.filter(pk=recipes[0].pk).update(name='Другое')
+    assert client.get(url).json()['name'] == recipes[0].name
+    other = FileBasedCache(settings.CACHES['default']['LOCATION'], {})
+    key = VERSION_KEY.format(name='recipes')
+    other.set(key, other.get(key) + 1, timeout=None)
+    assert client.get(url).json()['name'] == 'Другое'
+
+
+def test_cached_responses_expire():
+    assert response_cache.default_timeout == settings.CACHES[
+        'responses'
+    ]['TIMEOUT'] > 0
@@ -0,0 +1,46 @@
+import pytest
+
+from api.catalog import known_ingredients, known_tags
+from recipes.models import Ingredient, Tag
+from tests.conftest import image_data
+
+
+def payload(tag, ingredient):
+    return {
+        'name': 'Рецепт',
+        'text': 'Описание',
+        'cooking_time': 5,
+        'image': image_data(),
+        'tags': [tag.id],
+        'ingredients': [{'id': ingredient.id, 'amount': 10}],
+    }
+
+
+@pytest.mark.parametrize('field', ('tags', 'ingredients'))
+def test_catalog_deleted_by_another_process(
+    users, tags, ingredients, recipes, client_for, field
+):
+    tag = Tag.objects.create(name='Удаляемый', slug='deleted')
+    ingredient = Ingredient.objects.create(
+        name='Удаляемый', measurement_unit='г'
+    )
+    known_tags.existing([tag.id])
+    known_ingredients.existing([ingredient.id])
+    # Удаление без сигналов: версия каталога в этом процессе не меняется.
+    model = Tag if field == 'tags' else Ingredient
+    model.objects.filter(name='Удаляемый')._raw_delete('default')
+    message = 'Недопустимый первичный ключ "{}" - объект не существует.'
+    errors = {
+        'tags': {'tags': [message.format(tag.id)]},
+        'ingredients': {
+            'ingredients': [{'id': [message.format(ingredient.id)]}]
+        },
+    }
+    client = client_for(users[0])
+    for url, method in (
+        ('/api/recipes/', client.post),
+        (f'/api/recipes/{recipes[0].id}/', client.patch),
+    ):
+        response = method(url, payload(tag, ingredient), format='json')
+        assert response.status_code == 400
+        assert response.json() == errors[field]
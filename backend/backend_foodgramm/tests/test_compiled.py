@@ -0,0 +1,118 @@
+import pytest
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache.backends.filebased import FileBasedCache
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIClient, APIRequestFactory
+
+from api.cache import VERSION_KEY
+from api.compiled import serialize_recipes
+from api.fragments import fragment_cache
+from api.serializers import ResipesReadSerializer
+from api.views import ResipesViewSet
+from recipes.models import (
+    Favorite, Follow, Recipe, ShoppingCart, Tag, User
+)
+
+URLS = (
+    '/api/recipes/?limit=100',
+    '/api/recipes/?pagination=cursor&limit=3',
+    '/api/recipes/?tags=lunch&search=Рецепт',
+)
+
+
+@pytest.fixture
+def golden(users, recipes):
+    author, reader, _ = users
+    # Аватар и первое изображение с готовыми размерами, второе — без.
+    User.objects.filter(pk=author.pk).update(
+        avatar='users/аватар.png', avatar_renditions_name='users/аватар.png'
+    )
+    Recipe.objects.filter(pk=recipes[0].pk).update(
+        image='recipes/images/фото 1.png',
+        image_renditions_name='recipes/images/фото 1.png',
+    )
+    Recipe.objects.filter(pk=recipes[1].pk).update(
+        image='recipes/images/фото 2.png'
+    )
+    Recipe.objects.create(
+        author=users[2],
+        name='Без тегов',
+        text='Строка\n"кавычки" и \\ слеш',
+        cooking_time=3,
+        image='',
+    )
+    Follow.objects.create(user=reader, following=author)
+    Favorite.objects.create(user=reader, recipe=recipes[0])
+    ShoppingCart.objects.create(user=reader, recipe=recipes[3])
+    return users
+
+
+def make_request(url, user):
+    request = Request(APIRequestFactory().get(url))
+    request.user = user
+    return request
+
+
+def serializer_output(request, ids):
+    view = ResipesViewSet(request=request, action='list', format_kwarg=None)
+    recipes = view.get_read_queryset().in_bulk(ids)
+    return ResipesReadSerializer(
+        [recipes[pk] for pk in ids], many=True, context={'request': request}
+    ).data
+
+
+def readers(users):
+    return (AnonymousUser(), *users[1:])
+
+
+def test_serialize_recipes_matches_serializer(golden):
+    ids = list(Recipe.objects.values_list('id', flat=True))
+    for user in readers(golden):
+        request = make_request('/api/recipes/', user)
+        assert JSONRenderer().render(
+            serialize_recipes(ids, request)
+        ) == JSONRenderer().render(serializer_output(request, ids))
+
+
+@pytest.mark.parametrize('url', URLS)
+def test_list_response_matches_serializer(golden, client_for, url):
+    for user in readers(golden):
+        client = client_for(user) if user.is_authenticated else APIClient()
+        # Второй ответ собирается из кеша фрагментов.
+        for _ in range(2):
+            response = client.get(url)
+            assert response.status_code == 200
+            body = response.json()
+            body['results'] = serializer_output(
+                make_request(url, user),
+                [recipe['id'] for recipe in body['results']],
+            )
+            assert response.content == JSONRenderer().render(body)
+
+
+def test_fragments_follow_tag_renamed_by_another_process(
+    golden, client_for, settings
+):
+    client = client_for(golden[1])
+
+    def tag_names():
+        return {
+            tag['name']
+            for recipe in client.get('/api/recipes/?limit=100').json()[
+                'results'
+            ]
+            for tag in recipe['tags']
+        }
+
+    assert 'Обед' in tag_names()
+    Tag.objects.filter(slug='lunch').update(name='Полдник')
+    other = FileBasedCache(settings.CACHES['default']['LOCATION'], {})
+    key = VERSION_KEY.format(name='tags')
+    other.set(key, other.get(key) + 1, timeout=None)
+    names = tag_names()
+    assert 'Полдник' in names and 'Обед' not in names
+
+
+def test_fragments_expire():
+    assert fragment_cache.default_timeout > 0
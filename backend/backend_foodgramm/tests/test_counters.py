@@ -0,0 +1,91 @@
+from django.db.models import QuerySet
+
+from recipes.counters import change_counters
+from recipes.models import Favorite, Follow, Recipe, User
+from tests.conftest import image_data
+
+
+def counters(user):
+    return User.objects.values_list(
+        'recipes_count', 'subscriptions_count', 'subscribers_count'
+    ).get(pk=user.pk)
+
+
+def test_full_save_keeps_counters(users, recipes):
+    author = User.objects.get(pk=users[0].pk)
+    recipe = Recipe.objects.get(pk=recipes[0].pk)
+    Follow.objects.create(user=users[1], following=users[0])
+    recipes[0].favorites.create(user=users[2])
+    author.first_name = 'Другое'
+    author.save()
+    recipe.name = 'Другое'
+    recipe.save()
+    assert counters(users[0]) == (4, 0, 1)
+    assert Recipe.objects.get(pk=recipe.pk).favorites_count == 1
+
+
+def test_avatar_update_keeps_counters(users, tags, ingredients, client_for):
+    user = users[2]
+    client = client_for(user)
+    # Пользователь попадает в кеш токенов до изменения счётчиков.
+    assert client.get('/api/users/me/').status_code == 200
+    assert client.post(
+        f'/api/users/{users[0].id}/subscribe/'
+    ).status_code == 201
+    Recipe.objects.create(
+        author=user, name='Рецепт', text='Описание', cooking_time=1
+    )
+    assert counters(user) == (1, 1, 0)
+    assert client.put(
+        '/api/users/me/avatar/', {'avatar': image_data()}, format='json'
+    ).status_code == 200
+    assert client.delete('/api/users/me/avatar/').status_code == 204
+    assert counters(user) == (1, 1, 0)
+    assert client.delete(
+        f'/api/users/{users[0].id}/subscribe/'
+    ).status_code == 204
+    assert counters(user) == (1, 0, 0)
+
+
+def test_decrement_does_not_go_below_zero(users):
+    follow = Follow(user=users[0], following=users[1])
+    change_counters(follow, -1)
+    assert counters(users[0]) == (0, 0, 0)
+    assert counters(users[1]) == (0, 0, 0)
+
+
+def test_bulk_add_counts_conflicting_rows_once(
+    users, recipes, client_for, monkeypatch
+):
+    bulk_create = QuerySet.bulk_create
+
+    def concurrent_bulk_create(queryset, objs, **kwargs):
+        # Параллельный запрос успевает добавить один из рецептов.
+        Favorite.objects.create(user=users[2], recipe=recipes[0])
+        return bulk_create(queryset, objs, **kwargs)
+
+    monkeypatch.setattr(QuerySet, 'bulk_create', concurrent_bulk_create)
+    response = client_for(users[2]).post(
+        '/api/recipes/favorite/bulk/',
+        {'recipes': [recipes[0].id, recipes[1].id]},
+        format='json',
+    )
+    assert response.status_code == 200
+    assert list(Recipe.objects.filter(
+        pk__in=(recipes[0].pk, recipes[1].pk)
+    ).order_by('pk').values_list('favorites_count', flat=True)) == [1, 1]
+
+
+def test_write_does_not_save_cached_user(users, client_for):
+    client = client_for(users[2])
+    assert client.get('/api/users/me/').status_code == 200
+    # Изменение без сигналов: кеш токенов о нём не знает.
+    User.objects.filter(pk=users[2].pk).update(
+        first_name='Новое', subscribers_count=5
+    )
+    assert client.put(
+        '/api/users/me/avatar/', {'avatar': image_data()}, format='json'
+    ).status_code == 200
+    user = User.objects.get(pk=users[2].pk)
+    assert (user.first_name, user.subscribers_count) == ('Новое', 5)
+    assert user.avatar
@@ -0,0 +1,87 @@
+from unittest import mock
+
+import pytest
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage, default_storage
+
+from recipes import images
+from recipes.images import RENDITIONS, generate_renditions, rendition_name
+from recipes.models import Recipe, User
+from tests.conftest import image_data
+
+
+def test_renditions_do_not_touch_storage(users, recipes, client_for):
+    with mock.patch.object(FileSystemStorage, 'exists') as exists:
+        for client in (client_for(users[2]), client_for(users[2])):
+            assert client.get('/api/recipes/?limit=100').status_code == 200
+            assert client.get(
+                f'/api/recipes/{recipes[0].id}/'
+            ).status_code == 200
+    exists.assert_not_called()
+
+
+def test_renditions_ready_after_generation(users, client_for):
+    client = client_for(users[2])
+    assert client.put(
+        '/api/users/me/avatar/', {'avatar': image_data()}, format='json'
+    ).status_code == 200
+    avatar = client.get('/api/users/me/').json()['avatar']
+    renditions = client.get('/api/users/me/').json()['avatar_renditions']
+    assert set(renditions.values()) == {avatar}
+    generate_renditions(User.objects.get(pk=users[2].pk).avatar.name)
+    renditions = client.get('/api/users/me/').json()['avatar_renditions']
+    assert all(url.endswith(f'_{name}.jpg') for name, url in (
+        renditions.items()
+    ))
+    user = User.objects.get(pk=users[2].pk)
+    assert user.avatar_renditions_name == user.avatar.name
+
+
+@pytest.fixture
+def no_background_renditions(monkeypatch):
+    # Фоновый поток писал бы в базу теста из другого соединения.
+    monkeypatch.setattr(images.executor, 'submit', lambda *args: None)
+
+
+def image_files(name):
+    return [
+        default_storage.exists(path)
+        for path in (name, *(
+            rendition_name(name, rendition) for rendition in RENDITIONS
+        ))
+    ]
+
+
+def test_replaced_avatar_files_are_deleted(
+    users, client_for, no_background_renditions,
+    django_capture_on_commit_callbacks
+):
+    client = client_for(users[2])
+    names = []
+    for _ in range(2):
+        with django_capture_on_commit_callbacks(execute=True):
+            assert client.put(
+                '/api/users/me/avatar/', {'avatar': image_data()},
+                format='json',
+            ).status_code == 200
+        names.append(User.objects.get(pk=users[2].pk).avatar.name)
+        generate_renditions(names[-1])
+    assert image_files(names[0]) == [False] * 4
+    assert image_files(names[1]) == [True] * 4
+    with django_capture_on_commit_callbacks(execute=True):
+        assert client.delete('/api/users/me/avatar/').status_code == 204
+    assert image_files(names[1]) == [False] * 4
+
+
+def test_recipe_image_deleted_only_when_unused(
+    recipes, no_background_renditions, django_capture_on_commit_callbacks
+):
+    # Рецепты из фикстуры используют одно изображение.
+    name = recipes[0].image.name
+    default_storage.save(name, ContentFile(b'image'))
+    with django_capture_on_commit_callbacks(execute=True):
+        Recipe.objects.get(pk=recipes[0].pk).delete()
+    assert default_storage.exists(name)
+    with django_capture_on_commit_callbacks(execute=True):
+        Recipe.objects.filter(image=name).delete()
+    assert not default_storage.exists(name)
@@ -0,0 +1,41 @@
+import re
+
+from rest_framework.authtoken.models import Token
+from rest_framework.response import Response
+from rest_framework.serializers import BaseSerializer
+from rest_framework.test import APIClient, APIRequestFactory
+
+from api.views import metrics_view
+
+
+def test_metrics_require_staff(users):
+    factory = APIRequestFactory()
+    assert metrics_view(factory.get('/api/metrics/')).status_code == 401
+    users[0].is_staff = True
+    users[0].save()
+    for user, status in ((users[1], 403), (users[0], 200)):
+        token, _ = Token.objects.get_or_create(user=user)
+        assert metrics_view(factory.get(
+            '/api/metrics/', HTTP_AUTHORIZATION=f'Token {token.key}'
+        )).status_code == status
+
+
+def test_compiled_list_reports_render_time(recipes, settings):
+    settings.METRICS_ENABLED = True
+    response = APIClient().get('/api/recipes/')
+    assert response.status_code == 200
+    render = re.search(r'render;dur=([\d.]+)', response['Server-Timing'])
+    assert float(render.group(1)) > 0
+
+
+def test_metrics_do_not_patch_drf(tags, settings):
+    settings.METRICS_ENABLED = True
+    response = APIClient().get('/api/tags/?format=json')
+    assert response.status_code == 200
+    timing = dict(re.findall(
+        r'(\w+);(?:desc="[^"]*";)?dur=([\d.]+)', response['Server-Timing']
+    ))
+    assert float(timing['serializer']) > 0
+    assert float(timing['render']) > 0
+    assert not hasattr(BaseSerializer.data.fget, '__wrapped__')
+    assert not hasattr(Response.rendered_content.fget, '__wrapped__')
@@ -0,0 +1,53 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from api.cache import response_cache
+
+from tests.conftest import create_recipes
+
+
+def count_queries(client, url):
+    # Ответы анонимам кешируются целиком, замеряется сама выборка.
+    response_cache.clear()
+    with CaptureQueriesContext(connection) as context:
+        assert client.get(url).status_code == 200
+    return len(context)
+
+
+@pytest.fixture
+def many_recipes(users, tags, ingredients, recipes):
+    return recipes + create_recipes(
+        users[2], tags, ingredients, 100, name='Ещё'
+    )
+
+
+@pytest.mark.parametrize('authenticated', (False, True))
+def test_recipe_list_queries_do_not_depend_on_page_size(
+    users, many_recipes, client_for, authenticated
+):
+    client = client_for(users[0]) if authenticated else APIClient()
+    # Прогрев: токен, справочники и фрагменты рецептов.
+    client.get('/api/recipes/?limit=100')
+    assert count_queries(client, '/api/recipes/?limit=1') == count_queries(
+        client, '/api/recipes/?limit=100'
+    )
+
+
+@pytest.mark.parametrize('authenticated', (False, True))
+def test_recipe_detail_queries_do_not_depend_on_size(
+    users, tags, ingredients, recipes, client_for, authenticated
+):
+    client = client_for(users[0]) if authenticated else APIClient()
+    small = recipes[0]
+    large = create_recipes(users[2], tags, ingredients, 1, name='Большой')[0]
+    for ingredient in ingredients:
+        large.recipe_ingredients.get_or_create(
+            ingredient=ingredient, defaults={'amount': 1}
+        )
+    for recipe in (small, large):
+        client.get(f'/api/recipes/{recipe.id}/')
+    assert count_queries(client, f'/api/recipes/{small.id}/') == (
+        count_queries(client, f'/api/recipes/{large.id}/')
+    )
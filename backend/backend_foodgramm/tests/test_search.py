@@ -0,0 +1,36 @@
+from django.core.management.sql import emit_post_migrate_signal
+from django.db import connection
+from rest_framework.test import APIClient
+
+from recipes.models import Recipe
+from recipes.search import SQLITE_TRIGGERS
+
+
+def found_names(query):
+    return {
+        recipe['name'] for recipe in APIClient().get(
+            '/api/recipes/', {'search': query, 'limit': 100}
+        ).json()['results']
+    }
+
+
+def rename(recipe, name):
+    recipe = Recipe.objects.get(pk=recipe.pk)
+    recipe.name = name
+    recipe.save()
+
+
+def test_search_finds_edited_recipe(recipes):
+    rename(recipes[0], 'Шарлотка')
+    assert found_names('шарлотка') == {'Шарлотка'}
+    assert recipes[0].name not in found_names(recipes[0].name)
+
+
+def test_search_triggers_restored_after_migrate(recipes):
+    # Так SQLite теряет триггеры, пересоздавая таблицу в миграции.
+    with connection.cursor() as cursor:
+        for name in SQLITE_TRIGGERS:
+            cursor.execute(f'DROP TRIGGER {name}')
+    emit_post_migrate_signal(verbosity=0, interactive=False, db='default')
+    rename(recipes[0], 'Шарлотка')
+    assert found_names('шарлотка') == {'Шарлотка'}
@@ -0,0 +1,70 @@
+from recipes.models import RecipeIngredient, ShoppingCart
+from recipes.shopping_cart import find_inconsistencies, stored_totals
+
+
+def test_totals_follow_api_changes(users, ingredients, recipes, client_for):
+    client = client_for(users[2])
+    assert client.post(
+        f'/api/recipes/{recipes[0].id}/shopping_cart/'
+    ).status_code == 201
+    assert client.post('/api/recipes/shopping_cart/bulk/', {
+        'recipes': [recipe.id for recipe in recipes[1:4]]
+    }, format='json').status_code == 200
+    assert find_inconsistencies() == []
+    response = client_for(users[0]).patch(
+        f'/api/recipes/{recipes[0].id}/',
+        {
+            'ingredients': [{'id': ingredients[3].id, 'amount': 40}],
+            'tags': [recipes[0].tags.first().id],
+            'name': 'Новое название',
+            'text': 'Описание',
+            'cooking_time': 5,
+        },
+        format='json',
+    )
+    assert response.status_code == 200
+    assert find_inconsistencies() == []
+    assert client.delete('/api/recipes/shopping_cart/bulk/', {
+        'recipes': [recipes[1].id, recipes[2].id]
+    }, format='json').status_code == 200
+    assert client.delete(
+        f'/api/recipes/{recipes[0].id}/shopping_cart/'
+    ).status_code == 204
+    assert find_inconsistencies() == []
+
+
+def test_totals_follow_admin_changes(users, ingredients, recipes):
+    user = users[2]
+    for recipe in recipes[:4]:
+        ShoppingCart.objects.create(user=user, recipe=recipe)
+    assert find_inconsistencies() == []
+    recipe_ingredient = recipes[0].recipe_ingredients.first()
+    recipe_ingredient.amount += 100
+    recipe_ingredient.save()
+    recipe_ingredient = recipes[1].recipe_ingredients.first()
+    recipe_ingredient.ingredient = ingredients[3]
+    recipe_ingredient.save()
+    RecipeIngredient.objects.create(
+        recipe=recipes[2], ingredient=ingredients[2], amount=7
+    )
+    recipes[3].recipe_ingredients.first().delete()
+    assert find_inconsistencies() == []
+    cart = ShoppingCart.objects.get(user=user, recipe=recipes[1])
+    cart.recipe = recipes[5]
+    cart.save()
+    assert find_inconsistencies() == []
+    recipes[0].delete()
+    ShoppingCart.objects.filter(recipe=recipes[2]).delete()
+    assert find_inconsistencies() == []
+
+
+def test_deleted_recipe_leaves_shopping_list(
+    users, ingredients, recipes, client_for
+):
+    client = client_for(users[2])
+    client.post(f'/api/recipes/{recipes[0].id}/shopping_cart/')
+    recipes[0].delete()
+    assert stored_totals([users[2].id]) == {}
+    response = client.get('/api/recipes/download_shopping_cart/')
+    content = b''.join(response.streaming_content).decode()
+    assert ingredients[0].name not in content
@@ -0,0 +1,83 @@
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from recipes.models import Follow, Recipe
+
+
+def feed_ids(client):
+    return {
+        recipe['id']
+        for recipe in client.get('/api/recipes/feed/?limit=100').json()[
+            'results'
+        ]
+    }
+
+
+def test_feed_keeps_recipes_after_author_loses_subscribers(
+    users, recipes, client_for, settings
+):
+    settings.FEED_FANOUT_MAX_SUBSCRIBERS = 1
+    author, reader, leaving = users
+    for user in (reader, leaving):
+        Follow.objects.create(user=user, following=author)
+    # Рецепт популярного автора не раскладывается по лентам.
+    recipe = Recipe.objects.create(
+        author=author, name='Новый', text='Описание', cooking_time=1
+    )
+    client = client_for(reader)
+    assert recipe.id in feed_ids(client)
+    Follow.objects.get(user=leaving, following=author).delete()
+    assert feed_ids(client) == set(
+        Recipe.objects.filter(author=author).values_list('id', flat=True)
+    )
+
+
+def test_feed_pages_merge_timeline_and_prolific_recipes(
+    users, recipes, client_for, settings
+):
+    settings.FEED_FANOUT_MAX_SUBSCRIBERS = 1
+    author, prolific, reader = users
+    Follow.objects.create(user=reader, following=author)
+    Follow.objects.create(user=reader, following=prolific)
+    Follow.objects.create(user=author, following=prolific)
+    Recipe.objects.create(
+        author=prolific, name='Новый', text='Описание', cooking_time=1
+    )
+    client = client_for(reader)
+    ids = []
+    url = '/api/recipes/feed/?limit=3'
+    while url:
+        page = client.get(url).json()
+        ids += [recipe['id'] for recipe in page['results']]
+        url = page['next']
+    assert ids == list(
+        Recipe.objects.filter(
+            author__in=(author, prolific)
+        ).values_list('id', flat=True)
+    )
+    previous = client.get(page['previous']).json()
+    assert [recipe['id'] for recipe in previous['results']] == ids[-6:-3]
+
+
+def test_feed_reads_timeline_by_index(users, recipes, client_for, settings):
+    settings.FEED_FANOUT_MAX_SUBSCRIBERS = 1
+    author, prolific, reader = users
+    Follow.objects.create(user=reader, following=author)
+    Follow.objects.create(user=reader, following=prolific)
+    Follow.objects.create(user=author, following=prolific)
+    with CaptureQueriesContext(connection) as queries:
+        assert client_for(reader).get('/api/recipes/feed/').status_code == 200
+    plans = []
+    with connection.cursor() as cursor:
+        for query in queries:
+            # Запросы ленты: ключи записей, рецепты популярных авторов и
+            # строки страницы.
+            if '"created_at"' in query['sql']:
+                cursor.execute(f'EXPLAIN QUERY PLAN {query["sql"]}')
+                plans += [row[-1] for row in cursor.fetchall()]
+    assert any('timeline_user_created_at_idx' in step for step in plans)
+    assert any('recipe_author_created_at_idx' in step for step in plans)
+    assert not [
+        step for step in plans
+        if 'SCAN recipes_' in step or 'TEMP B-TREE' in step
+    ]